@@ -0,0 +1,60 @@
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from functions import BlockType, block_to_block_type
+
+
+# the classifier as it was before precompiled patterns, used as the baseline
+def block_to_block_type_reference(block):
+    if re.match('^#+? .', block) is not None:
+        return BlockType.HEADING
+    if block.startswith('```') and block.endswith('```'):
+        return BlockType.CODE
+
+    lines = block.split('\n')
+    isQuote = [re.match('^>', l) is not None for l in lines]
+    if len(lines) == sum(isQuote):
+        return BlockType.QUOTE
+
+    isUL = [re.match('^- ', l) is not None for l in lines]
+    if len(lines) == sum(isUL):
+        return BlockType.UNORDERED_LIST
+
+    isOL = [re.match(r'^\d. ', l) is not None for l in lines]
+    if len(lines) == sum(isOL):
+        num = 0
+        for l in lines:
+            if int(l[0]) == num + 1:
+                num += 1
+                continue
+            else:
+                return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def make_blocks(lines):
+    return {
+        'paragraph': '\n'.join(f'line {i} of a long paragraph' for i in range(lines)),
+        'quote': '\n'.join(f'> quoted line {i}' for i in range(lines)),
+        'unordered': '\n'.join(f'- item {i}' for i in range(lines)),
+        'ordered (1-9)': '\n'.join(f'{i}. item {i}' for i in range(1, 10)),
+    }
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    for name, block in make_blocks(lines).items():
+        if block_to_block_type(block) != block_to_block_type_reference(block):
+            raise Exception(f'Classifiers disagree on the {name} block')
+
+        before = timeit.timeit(lambda: block_to_block_type_reference(block), number = number)
+        after = timeit.timeit(lambda: block_to_block_type(block), number = number)
+        print(f'{name:>14}: {before / number * 1e6:9.1f} us -> {after / number * 1e6:9.1f} us ({before / after:.1f}x)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from functions import text_to_textnodes, text_node_to_html_node
+from htmlnode import LeafNode
+from textnode import TextNode
+
+PARAGRAPH = (
+    'This is **bold** and _italic_ text with `code`, a [link](https://example.com/page) '
+    'and an ![image](/images/picture.png) followed by plain words. '
+)
+
+# the node classes as they were before __slots__, used as the baseline
+class DictTextNode:
+    def __init__(self, text, text_type, url = None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictLeafNode:
+    def __init__(self, tag, value, props = None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+def build_nodes(text_node_cls, leaf_cls, spans):
+    nodes = []
+    for node in spans:
+        text_node = text_node_cls(node.text, node.text_type, node.url)
+        nodes.append(text_node)
+        nodes.append(leaf_cls(None, text_node.text))
+    return nodes
+
+def measure(label, text_node_cls, leaf_cls, spans):
+    tracemalloc.start()
+    start = time.perf_counter()
+    nodes = build_nodes(text_node_cls, leaf_cls, spans)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    print(f'{label:>8}: {len(nodes)} nodes, {current / 1024 / 1024:7.2f} MiB live, '
+          f'{peak / 1024 / 1024:7.2f} MiB peak, {blocks} blocks, {elapsed * 1000:7.1f} ms')
+    return current
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    spans = []
+    for i in range(paragraphs):
+        spans.extend(text_to_textnodes(PARAGRAPH))
+    # make sure the real conversion path still works with slotted nodes
+    text_node_to_html_node(spans[0])
+
+    plain = measure('dict', DictTextNode, DictLeafNode, spans)
+    slotted = measure('slots', TextNode, LeafNode, spans)
+    print(f'savings: {(1 - slotted / plain) * 100:.1f}% of node memory')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    'the ring elves hobbit shire mordor river valley road king tower wizard '
+    'mountain forest song council journey shadow light star stone sword'
+).split()
+
+DEFAULT_MIX = {
+    'heading': 2,
+    'paragraph': 4,
+    'links': 3,
+    'list': 2,
+    'ordered': 1,
+    'code': 1,
+    'quote': 1,
+}
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+def inline(rng, count):
+    parts = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f'**{words(rng, 2)}**')
+        elif roll < 0.2:
+            parts.append(f'_{words(rng, 2)}_')
+        elif roll < 0.25:
+            parts.append(f'`{rng.choice(WORDS)}()`')
+        else:
+            parts.append(words(rng, 1))
+    return ' '.join(parts)
+
+def make_block(rng, kind, page_index):
+    if kind == 'heading':
+        return '#' * rng.randint(2, 4) + ' ' + inline(rng, 4)
+    if kind == 'paragraph':
+        return '\n'.join(inline(rng, 12) for _ in range(rng.randint(1, 4)))
+    if kind == 'links':
+        links = [f'[{words(rng, 2)}](/section/page-{rng.randint(0, 999)})' for _ in range(rng.randint(5, 20))]
+        return ' and '.join(links) + f' ![figure {page_index}](/images/figure-{page_index % 50}.png)'
+    if kind == 'list':
+        return '\n'.join(f'- {inline(rng, 6)}' for _ in range(rng.randint(5, 30)))
+    if kind == 'ordered':
+        return '\n'.join(f'{i}. {inline(rng, 6)}' for i in range(1, rng.randint(3, 9) + 1))
+    if kind == 'code':
+        lines = [f'    {rng.choice(WORDS)} = "{words(rng, 3)}"' for _ in range(rng.randint(3, 15))]
+        return '```\n' + '\n'.join(lines) + '\n```'
+    if kind == 'quote':
+        return '\n'.join(f'> {inline(rng, 8)}' for _ in range(rng.randint(1, 5)))
+    raise Exception(f'Unknown block kind: {kind}')
+
+def make_page(rng, page_index, blocks, mix):
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    parts = [f'# Page {page_index} {words(rng, 3)}']
+    for kind in rng.choices(kinds, weights, k = blocks):
+        parts.append(make_block(rng, kind, page_index))
+    return '\n\n'.join(parts) + '\n'
+
+def generate_site(root, pages = 100, blocks = 40, mix = None, seed = 0, per_dir = 50):
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    paths = []
+    for i in range(pages):
+        directory = os.path.join(root, f'section-{i // per_dir}', f'page-{i}')
+        os.makedirs(directory, exist_ok = True)
+        path = os.path.join(directory, 'index.md')
+        with open(path, 'w') as f:
+            f.write(make_page(rng, i, blocks, mix))
+        paths.append(path)
+    return paths
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        kind, weight = item.split('=')
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown block kind {kind}, expected one of {", ".join(DEFAULT_MIX)}')
+        mix[kind] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description = 'generate a synthetic content/ tree')
+    parser.add_argument('root')
+    parser.add_argument('--pages', type = int, default = 100)
+    parser.add_argument('--blocks', type = int, default = 40, help = 'blocks per page')
+    parser.add_argument('--mix', type = parse_mix, default = None, help = 'e.g. heading=1,links=5,list=2')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    paths = generate_site(args.root, args.pages, args.blocks, args.mix, args.seed)
+    print(f'Wrote {len(paths)} pages to {args.root}')
+
+if __name__ == '__main__':
+    main()
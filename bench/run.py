@@ -0,0 +1,138 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+from corpus import generate_site
+from functions import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html, text_to_textnodes
+from main import generate_page_recursive
+
+TEMPLATE = '<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>\n'
+
+
+def inline_texts(block, block_type):
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return [block.replace('\n', ' ')]
+        case BlockType.HEADING:
+            return [block.lstrip('#').strip()]
+        case BlockType.CODE:
+            return []
+        case BlockType.QUOTE:
+            return [l.strip('>').strip() for l in block.split('\n')]
+        case BlockType.UNORDERED_LIST:
+            return [l[2:] for l in block.split('\n')]
+        case BlockType.ORDERED_LIST:
+            return [l.split('. ', 1)[1] for l in block.split('\n')]
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd = BENCH_DIR, capture_output = True, text = True, check = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, 'content')
+        paths = generate_site(content, args.pages, args.blocks, seed = args.seed)
+        template = os.path.join(tmp, 'template.html')
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+
+        documents = []
+        for path in paths:
+            with open(path, 'r') as f:
+                documents.append(f.read())
+
+        blocks = [b for md in documents for b in markdown_to_blocks(md)]
+        typed = [(b, block_to_block_type(b)) for b in blocks]
+        texts = [t for b, block_type in typed for t in inline_texts(b, block_type)]
+        trees = [markdown_to_html(md) for md in documents]
+
+        def full_build():
+            out = os.path.join(tmp, f'docs-{time.perf_counter_ns()}')
+            os.mkdir(out)
+            with contextlib.redirect_stdout(io.StringIO()):
+                errors = generate_page_recursive(content, template, out, '/', jobs = args.jobs)
+            if errors:
+                raise Exception(f'Benchmark build failed: {errors[0]}')
+
+        stages = {
+            'markdown_to_blocks': best_of(args.repeat, lambda: [markdown_to_blocks(md) for md in documents]),
+            'block_to_block_type': best_of(args.repeat, lambda: [block_to_block_type(b) for b in blocks]),
+            'text_to_textnodes': best_of(args.repeat, lambda: [text_to_textnodes(t) for t in texts]),
+            'markdown_to_html': best_of(args.repeat, lambda: [markdown_to_html(md) for md in documents]),
+            'to_html': best_of(args.repeat, lambda: [tree.to_html() for tree in trees]),
+            'generate_page_recursive': best_of(args.repeat, full_build),
+        }
+
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'corpus': {
+            'pages': args.pages,
+            'blocks_per_page': args.blocks,
+            'seed': args.seed,
+            'bytes': sum(len(md) for md in documents),
+            'blocks': len(blocks),
+            'inline_texts': len(texts),
+        },
+        'jobs': args.jobs,
+        'repeat': args.repeat,
+        'stages': stages,
+    }
+
+def report(results, baseline = None):
+    print(f'{results["corpus"]["pages"]} pages, {results["corpus"]["bytes"] / 1024 / 1024:.1f} MiB of markdown')
+    for stage, seconds in results['stages'].items():
+        line = f'{stage:>24}: {seconds * 1000:9.1f} ms'
+        if baseline is not None and stage in baseline['stages']:
+            before = baseline['stages'][stage]
+            line += f'  ({(seconds - before) / before * 100:+.1f}% vs {baseline.get("commit")})'
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description = 'time each build stage on a synthetic site')
+    parser.add_argument('--pages', type = int, default = 200)
+    parser.add_argument('--blocks', type = int, default = 40, help = 'blocks per page')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--repeat', type = int, default = 3, help = 'report the best of N runs')
+    parser.add_argument('--jobs', type = int, default = 1, help = 'worker processes for the full build')
+    parser.add_argument('--output', default = 'bench_output.json', help = 'where to save the results')
+    parser.add_argument('--compare', metavar = 'JSON', help = 'earlier results to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent = 2)
+    print(f'Saved results to {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.html', '.css', '.js', '.svg', '.xml', '.json', '.txt', '.md')
+SUFFIXES = ('.gz', '.br')
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE
+
+def remove_siblings(path):
+    for suffix in SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def write_bytes(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class CompressingWriter:
+    # tees every fragment written to a page into gzip and brotli streams and a content hash
+    def __init__(self, write, use_brotli = True):
+        self.target_write = write
+        self.hash = hashlib.sha256()
+        # wbits 31 writes a gzip header with no mtime, so equal input gives equal bytes
+        self.gzip = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.gzip_parts = []
+        self.brotli = brotli.Compressor() if use_brotli and brotli is not None else None
+        self.brotli_parts = []
+
+    def write(self, text):
+        self.target_write(text)
+        data = text.encode('utf-8')
+        self.hash.update(data)
+        self.gzip_parts.append(self.gzip.compress(data))
+        if self.brotli is not None:
+            self.brotli_parts.append(self.brotli.process(data))
+
+class Precompressor:
+    def __init__(self, path = None, digests = None, use_brotli = True):
+        # digests maps every output to the content hash its siblings were written from
+        self.path = path
+        self.use_brotli = use_brotli and brotli is not None
+        self.digests = dict(digests or {})
+        self.updated = {}
+        self.written = 0
+        self.skipped = 0
+        if path is not None and digests is None and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.digests = json.load(f)
+
+    def tee(self, write):
+        return CompressingWriter(write, self.use_brotli)
+
+    def finish(self, dest_path, writer):
+        dest_path = os.path.normpath(dest_path)
+        digest = writer.hash.hexdigest()
+        suffixes = SUFFIXES if writer.brotli is not None else SUFFIXES[:1]
+        if self.digests.get(dest_path) == digest and all(os.path.exists(dest_path + s) for s in suffixes):
+            self.skipped += 1
+            return
+
+        write_bytes(dest_path + '.gz', b''.join(writer.gzip_parts) + writer.gzip.flush())
+        if writer.brotli is not None:
+            write_bytes(dest_path + '.br', b''.join(writer.brotli_parts) + writer.brotli.finish())
+        self.digests[dest_path] = digest
+        self.updated[dest_path] = digest
+        self.written += 1
+
+    def write_text(self, dest_path, text):
+        writer = self.tee(lambda _: None)
+        writer.write(text)
+        self.finish(dest_path, writer)
+
+    def compress_file(self, source, dest_path):
+        # static files are compressed from their source while they are copied
+        with open(source, 'rb') as f:
+            data = f.read()
+        write_bytes(dest_path + '.gz', zlib.compress(data, 9, 31))
+        if self.use_brotli:
+            write_bytes(dest_path + '.br', brotli.compress(data))
+
+    def has_siblings(self, dest_path):
+        suffixes = SUFFIXES if self.use_brotli else SUFFIXES[:1]
+        return all(os.path.exists(dest_path + s) for s in suffixes)
+
+    def take_updates(self):
+        updated, self.updated = self.updated, {}
+        return updated
+
+    def merge(self, updated, written, skipped):
+        self.digests.update(updated)
+        self.written += written
+        self.skipped += skipped
+
+    def forget(self, dest_path):
+        self.digests.pop(os.path.normpath(dest_path), None)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(self.path, 'w') as f:
+            json.dump(self.digests, f, indent = 1, sort_keys = True)
+
+    def __str__(self):
+        formats = 'gzip and brotli' if self.use_brotli else 'gzip, brotli is not installed'
+        return f'{self.written} written, {self.skipped} unchanged ({formats})'
@@ -0,0 +1,149 @@
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+GRAPH_VERSION = 2
+
+
+def site_path(url, page_url):
+    # the target of a link or image as a path from the site root, None when it is external
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = parts.path
+    if not path.startswith('/'):
+        path = page_url.rsplit('/', 1)[0] + '/' + path
+    normalized = posixpath.normpath(path)
+    if path.endswith('/') and normalized != '/':
+        normalized += '/'
+    return normalized
+
+def mtime_of(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class DependencyGraph:
+    # for every output: the files it was built from with their mtimes, the outputs
+    # it links to and the (line, target) references behind them, whether it reads
+    # the page index, and why it was last built
+    def __init__(self, path):
+        self.path = path
+        self.outputs = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') == GRAPH_VERSION:
+            self.outputs = data.get('outputs', {})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': GRAPH_VERSION, 'outputs': self.outputs}, f, indent = 1, sort_keys = True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, output, source, files, links = (), index = False, reason = None, references = ()):
+        files = {os.path.normpath(p) for p in files}
+        self.outputs[os.path.normpath(output)] = {
+            'source': os.path.normpath(source) if source is not None else None,
+            'files': {p: mtime_of(p) for p in sorted(files)},
+            'links': sorted({os.path.normpath(l) for l in links}),
+            'index': index,
+            'reason': reason,
+            'references': [list(reference) for reference in references],
+        }
+
+    def refresh(self, output):
+        # an output that turned out to be fresh is current with its inputs again
+        node = self.outputs.get(os.path.normpath(output))
+        if node is not None:
+            node['files'] = {p: mtime_of(p) for p in node['files']}
+
+    def has(self, output):
+        return os.path.normpath(output) in self.outputs
+
+    def discard(self, output):
+        self.outputs.pop(os.path.normpath(output), None)
+
+    def retain(self, outputs):
+        # drops pages whose source is gone, generated outputs are discarded by their generator
+        outputs = {os.path.normpath(o) for o in outputs}
+        for output, node in list(self.outputs.items()):
+            if node['source'] is not None and output not in outputs:
+                del self.outputs[output]
+
+    def files(self):
+        return {path for node in self.outputs.values() for path in node['files']}
+
+    def changed_files(self):
+        # inputs whose mtime differs from the one an output was last built from
+        changed = set()
+        for node in self.outputs.values():
+            for path, mtime in node['files'].items():
+                if path not in changed and mtime_of(path) != mtime:
+                    changed.add(path)
+        return sorted(changed)
+
+    def rebuild_set(self, changed_files, added_outputs = (), removed_outputs = ()):
+        # maps every output that has to be rebuilt to the reason why. Links only
+        # matter when their target appears or disappears, and generated pages
+        # only when some page, and with it the index, was rebuilt
+        changed_files = {os.path.normpath(p) for p in changed_files}
+        moved = {os.path.normpath(o) for o in list(added_outputs) + list(removed_outputs)}
+
+        reasons = {}
+        for output, node in self.outputs.items():
+            if output in moved and node['source'] is not None and not os.path.exists(node['source']):
+                continue
+            for path in node['files']:
+                if path in changed_files:
+                    reasons[output] = f'{path} changed'
+                    break
+            else:
+                for target in node['links']:
+                    if target in moved:
+                        reasons[output] = f'links to {target}, which was added or removed'
+                        break
+
+        pages = [o for o in list(reasons) + sorted(moved) if not self.outputs.get(o, {}).get('index')]
+        if pages:
+            for output, node in self.outputs.items():
+                if node['index'] and output not in reasons:
+                    reasons[output] = f'lists pages from the index and {pages[0]} changed'
+        return reasons
+
+    def explain(self, output):
+        output = os.path.normpath(output)
+        node = self.outputs.get(output)
+        if node is None:
+            return [f'{output} is not in the dependency graph, it was never built']
+
+        lines = [f'{output} was last built because: {node["reason"] or "unknown"}']
+        if node['source'] is not None:
+            lines.append(f'source: {node["source"]}')
+        for path, mtime in node['files'].items():
+            note = ' (changed since)' if mtime_of(path) != mtime else ''
+            lines.append(f'depends on {path}{note}')
+        for target in node['links']:
+            lines.append(f'links to {target}')
+        if node['index']:
+            lines.append('reads the page index')
+
+        users = sorted(o for o, n in self.outputs.items() if output in n['links'])
+        for user in users:
+            lines.append(f'linked from {user}')
+
+        pending = self.rebuild_set(self.changed_files()).get(output)
+        if pending is not None:
+            lines.append(f'the next build rebuilds it: {pending}')
+        return lines
@@ -0,0 +1,197 @@
+import email.utils
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from compress import remove_siblings
+from htmlnode import LeafNode, ParentNode
+from manifest import prune_empty_dirs
+from minify import minify_html
+
+FEED_ITEMS = 20
+TAG_SLUG = re.compile(r'[^a-z0-9-]+')
+
+
+def page_url(base, number):
+    return base if number == 1 else f'{base}page/{number}/'
+
+def output_path(root, url):
+    path = os.path.join(root, url.strip('/'), 'index.html')
+    if os.path.commonpath([os.path.abspath(root), os.path.abspath(path)]) != os.path.abspath(root):
+        raise ValueError(f'Generated page {url} would be written outside {root}')
+    return path
+
+def slugify_tag(tag):
+    # the path segment of a tag, None when the tag cannot be one
+    if '..' in tag or '/' in tag or '\\' in tag:
+        return None
+    return TAG_SLUG.sub('-', tag.lower()).strip('-') or None
+
+def tags_by_slug(index):
+    # tags that only differ in case or punctuation share one page
+    tags = {}
+    for tag, entries in index.by_tag().items():
+        slug = slugify_tag(tag)
+        if slug is None:
+            print(f'Skipping tag {tag!r}, it cannot be used in a URL')
+            continue
+        name, merged = tags.setdefault(slug, (tag, []))
+        merged.extend(e for e in entries if e not in merged)
+    # merging keeps every list newest first, like by_tag
+    for _, entries in tags.values():
+        entries.sort(key = lambda e: (e['date'] or '', e['url']), reverse = True)
+    return tags
+
+def listing_node(heading, entries, base, number, pages):
+    items = []
+    for entry in entries:
+        children = [LeafNode('a', entry['title'], {'href': entry['url']})]
+        if entry['date']:
+            children.append(LeafNode(None, f' {entry["date"]}'))
+        items.append(ParentNode('li', children))
+
+    nav = []
+    if number > 1:
+        nav.append(LeafNode('a', 'Newer', {'href': page_url(base, number - 1)}))
+    if number < pages:
+        nav.append(LeafNode('a', 'Older', {'href': page_url(base, number + 1)}))
+
+    children = [ParentNode('h1', [LeafNode(None, heading)])]
+    if items:
+        children.append(ParentNode('ul', items))
+    if nav:
+        children.append(ParentNode('nav', nav))
+    return ParentNode('div', children)
+
+def paginate(heading, entries, base, per_page):
+    pages = max(1, -(-len(entries) // per_page))
+    for number in range(1, pages + 1):
+        chunk = entries[(number - 1) * per_page:number * per_page]
+        title = heading if number == 1 else f'{heading} (page {number})'
+        yield page_url(base, number), title, listing_node(title, chunk, base, number, pages)
+
+def rfc822(date):
+    parsed = datetime.strptime(date[:10], '%Y-%m-%d').replace(tzinfo = timezone.utc)
+    return email.utils.format_datetime(parsed)
+
+def sitemap_xml(site_url, urls):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, date in urls:
+        lastmod = f'<lastmod>{escape(date)}</lastmod>' if date else ''
+        lines.append(f'<url><loc>{escape(site_url + url)}</loc>{lastmod}</url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+def rss_xml(site_url, title, entries):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0"><channel>',
+        f'<title>{escape(title)}</title><link>{escape(site_url)}/</link><description>{escape(title)}</description>',
+    ]
+    for entry in entries:
+        link = escape(site_url + entry['url'])
+        lines.append(
+            f'<item><title>{escape(entry["title"])}</title><link>{link}</link>'
+            f'<guid>{link}</guid><pubDate>{rfc822(entry["date"])}</pubDate></item>'
+        )
+    lines.append('</channel></rss>')
+    return '\n'.join(lines) + '\n'
+
+class GeneratedPages:
+    # remembers what was written last time so unchanged outputs are not rewritten
+    def __init__(self, path, precompressor = None, minify = False):
+        self.path = path
+        self.precompressor = precompressor
+        self.minify = minify
+        self.digests = {}
+        self.written = 0
+        self.unchanged = 0
+        self.updated = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.digests = json.load(f)
+        self.previous = set(self.digests)
+        self.current = set()
+
+    def write(self, dest_path, text):
+        dest_path = os.path.normpath(dest_path)
+        if self.minify and dest_path.endswith('.html'):
+            text = minify_html(text)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        self.current.add(dest_path)
+        siblings = self.precompressor is None or self.precompressor.has_siblings(dest_path)
+        if self.digests.get(dest_path) == digest and os.path.exists(dest_path) and siblings:
+            self.unchanged += 1
+            return
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok = True)
+        with open(dest_path + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(dest_path + '.tmp', dest_path)
+        if self.precompressor is not None:
+            self.precompressor.write_text(dest_path, text)
+        self.digests[dest_path] = digest
+        self.written += 1
+        self.updated.add(dest_path)
+
+    def finish(self, root):
+        removed = sorted(self.previous - self.current)
+        for dest_path in removed:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                remove_siblings(dest_path)
+                prune_empty_dirs(os.path.dirname(dest_path), root)
+            del self.digests[dest_path]
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(self.path, 'w') as f:
+            json.dump(self.digests, f, indent = 1, sort_keys = True)
+        return removed
+
+def generate_site_pages(index, template, root, state, listings = (), tags = False, site_url = None, basepath = '/', per_page = 10):
+    if per_page < 1:
+        raise ValueError('Listing pages need at least one entry per page')
+
+    def render(url, title, node):
+        parts = []
+        template.write(parts.append, title, node)
+        state.write(output_path(root, url), ''.join(parts))
+
+    taken = {entry['url'] for entry in index.pages(include_drafts = True)}
+    dated = index.by_date()
+    generated = []
+
+    for section in listings:
+        base = '/' + section.strip('/') + '/'
+        entries = [e for e in dated if e['url'].startswith(base) and e['url'] != base]
+        for url, title, node in paginate(section.strip('/').title(), entries, base, per_page):
+            if url in taken:
+                print(f'Not generating listing {url}, a content page already uses it')
+                continue
+            render(url, title, node)
+            generated.append(url)
+
+    if tags:
+        by_slug = tags_by_slug(index)
+        items = [ParentNode('li', [LeafNode('a', by_slug[slug][0], {'href': f'/tags/{slug}/'})]) for slug in sorted(by_slug)]
+        render('/tags/', 'Tags', ParentNode('div', [ParentNode('h1', [LeafNode(None, 'Tags')]), ParentNode('ul', items or [LeafNode(None, '')])]))
+        generated.append('/tags/')
+        for slug, (tag, entries) in by_slug.items():
+            for url, title, node in paginate(f'Tagged {tag}', entries, f'/tags/{slug}/', per_page):
+                render(url, title, node)
+                generated.append(url)
+
+    if site_url is not None:
+        prefix = site_url.rstrip('/') + basepath.rstrip('/')
+        urls = [(e['url'], e['date']) for e in dated] + [(url, None) for url in generated]
+        state.write(os.path.join(root, 'sitemap.xml'), sitemap_xml(prefix, urls))
+        feed_entries = [e for e in dated if e['date']][:FEED_ITEMS]
+        home = [e['title'] for e in dated if e['url'] == '/']
+        state.write(os.path.join(root, 'feed.xml'), rss_xml(prefix, home[0] if home else site_url, feed_entries))
+
+    return state.finish(root)
@@ -0,0 +1,32 @@
+import hashlib
+import json
+import os
+
+FINGERPRINT_LENGTH = 10
+
+
+def fingerprint_name(path, digest):
+    root, extension = os.path.splitext(path)
+    return f'{root}.{digest[:FINGERPRINT_LENGTH]}{extension}'
+
+class AssetMap:
+    # site urls of static files, e.g. /index.css, to their fingerprinted urls
+    def __init__(self, urls = None):
+        self.urls = dict(urls or {})
+        text = json.dumps(self.urls, sort_keys = True)
+        self.digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, url):
+        return self.urls.get(url, url)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(path, 'w') as f:
+            json.dump(self.urls, f, indent = 1, sort_keys = True)
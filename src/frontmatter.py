@@ -0,0 +1,46 @@
+import itertools
+
+FENCE = '---'
+
+
+def parse_value(text):
+    if text.startswith('[') and text.endswith(']'):
+        return [parse_value(item.strip()) for item in text[1:-1].split(',') if item.strip()]
+    if text in ('true', 'false'):
+        return text == 'true'
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    return text
+
+def read_front_matter(lines):
+    # returns the metadata and an iterator over the markdown that follows it
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip() != FENCE:
+        return {}, itertools.chain([first], lines)
+
+    meta = {}
+    list_key = None
+    for line in lines:
+        stripped = line.strip()
+        if line.rstrip() == FENCE:
+            return meta, lines
+
+        # "key:" followed by "  - item" lines is a list
+        if list_key is not None and stripped.startswith('- '):
+            meta[list_key].append(parse_value(stripped[2:].strip()))
+            continue
+
+        key, separator, value = line.partition(':')
+        if not separator or not key.strip():
+            continue
+        value = value.strip()
+        if value == '':
+            list_key = key.strip()
+            meta[list_key] = []
+        else:
+            list_key = None
+            meta[key.strip()] = parse_value(value)
+    raise Exception('Front matter is missing its closing ---')
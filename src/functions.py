@@ -2,7 +2,9 @@ import re
 from enum import Enum
 
 
+from highlight import highlight, language_for
 from htmlnode import LeafNode, ParentNode
+from search import plain_texts
 from textnode import TextNode, TextType
 
 def text_node_to_html_node(text_node):
@@ -20,10 +22,13 @@ def text_node_to_html_node(text_node):
                 'href': text_node.url
             })
         case TextType.IMAGE:
-            return LeafNode(tag = 'img', value = '', props = {
+            props = {
                 'src': text_node.url,
                 'alt': text_node.text
-            })
+            }
+            if image_stage is not None:
+                props.update(image_stage.attributes(text_node.url))
+            return LeafNode(tag = 'img', value = '', props = props)
         case _:
             raise Exception('Invalid TextNode text_type')
 
@@ -105,7 +110,60 @@ def split_nodes_link(old_nodes):
      
     return new_nodes
 
+INLINE_DELIMITERS = (
+    ('**', TextType.BOLD),
+    ('_', TextType.ITALIC),
+    ('`', TextType.CODE),
+)
+LINK_OR_IMAGE = re.compile(r'(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)')
+
 def text_to_textnodes(text):
+    nodes = []
+    lex_delimited(text, 0, nodes)
+    return nodes
+
+def lex_delimited(text, level, nodes):
+    # delimiters are matched in the same precedence as the split passes:
+    # bold wins over italic, italic over code, links only in what is left
+    if level == len(INLINE_DELIMITERS):
+        lex_links(text, nodes)
+        return
+
+    delimiter, text_type = INLINE_DELIMITERS[level]
+    width = len(delimiter)
+    position = 0
+    while True:
+        start = text.find(delimiter, position)
+        if start == -1:
+            break
+        end = text.find(delimiter, start + width)
+        if end == -1:
+            raise Exception(f'Old node has invalid markdown syntax unmatched delimiter: {delimiter}')
+
+        if start > position:
+            lex_delimited(text[position:start], level + 1, nodes)
+        if end > start + width:
+            nodes.append(TextNode(text[start + width:end], text_type))
+        position = end + width
+
+    if position < len(text):
+        lex_delimited(text[position:] if position else text, level + 1, nodes)
+
+def lex_links(text, nodes):
+    position = 0
+    for match in LINK_OR_IMAGE.finditer(text):
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        text_type = TextType.IMAGE if match.group(1) else TextType.LINK
+        nodes.append(TextNode(match.group(2), text_type, match.group(3)))
+        position = match.end()
+
+    if position < len(text):
+        nodes.append(TextNode(text[position:] if position else text, TextType.TEXT))
+
+def text_to_textnodes_reference(text):
+    # the original multi-pass implementation, kept for differential tests. It loses
+    # the text between two copies of the same link or image, text_to_textnodes does not
     new_nodes = [TextNode(text, TextType.TEXT)]
 
     # process bold
@@ -134,6 +192,23 @@ def markdown_to_blocks(markdown):
             blocks.append(stripped)
     return blocks
 
+def iter_blocks(lines):
+    # same blocks as markdown_to_blocks, but read from an iterable of lines
+    # (such as an open file) and yielded as soon as each one is complete
+    current = []
+    for line in lines:
+        if line == '\n':
+            block = ''.join(current).strip()
+            current = []
+            if block != '':
+                yield block
+        else:
+            current.append(line)
+
+    block = ''.join(current).strip()
+    if block != '':
+        yield block
+
 class BlockType(Enum):
     PARAGRAPH = 'paragraph'
     HEADING = 'heading'
@@ -142,35 +217,73 @@ class BlockType(Enum):
     UNORDERED_LIST = 'unordered_list'
     ORDERED_LIST = 'ordered_list'
 
+HEADING_PATTERN = re.compile(r'#+ .')
+ORDERED_ITEM_PATTERN = re.compile(r'(\d+)[.)] ')
+
 def block_to_block_type(block):
-    if re.match('^#+? .', block) is not None:
+    if HEADING_PATTERN.match(block) is not None:
         return BlockType.HEADING
     if block.startswith('```') and block.endswith('```'):
         return BlockType.CODE
     
+    # the first line decides which kind of block this can be, every
+    # other line only has to confirm it
     lines = block.split('\n')
-    isQuote = [re.match('^>', l) is not None for l in lines]
-    if len(lines) == sum(isQuote):
+    if lines[0].startswith('>'):
+        for l in lines:
+            if not l.startswith('>'):
+                return BlockType.PARAGRAPH
         return BlockType.QUOTE
 
-    isUL = [re.match('^- ', l) is not None for l in lines]
-    if len(lines) == sum(isUL):
-        return BlockType.UNORDERED_LIST
-
-    isOL = [re.match(r'^\d. ', l) is not None for l in lines]
-    if len(lines) == sum(isOL):
-        num = 0
+    if lines[0].startswith('- '):
         for l in lines:
-            if int(l[0]) == num + 1:
-                num += 1
-                continue
-            else:
+            if not l.startswith('- '):
                 return BlockType.PARAGRAPH
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+
+    num = 1
+    for l in lines:
+        match = ORDERED_ITEM_PATTERN.match(l)
+        if match is None or int(match.group(1)) != num:
+            return BlockType.PARAGRAPH
+        num += 1
+    return BlockType.ORDERED_LIST
+
+inline_cache = None
+image_stage = None
+text_collector = None
+
+def set_inline_cache(cache):
+    global inline_cache
+    inline_cache = cache
+
+def set_image_stage(stage):
+    global image_stage
+    image_stage = stage
+
+def set_text_collector(collector):
+    global text_collector
+    text_collector = collector
 
 def text_to_children(text):
+    if inline_cache is not None:
+        cached = inline_cache.get(text)
+        if cached is None:
+            nodes = text_to_textnodes(text)
+            # the plain text is kept next to the HTML, so --search needs no parse on a hit
+            cached = (''.join([text_node_to_html_node(node).to_html() for node in nodes]), plain_texts(nodes))
+            inline_cache.put(text, cached)
+        html, texts = cached
+        if text_collector is not None:
+            text_collector.add(texts)
+        return [LeafNode(None, html)]
+
+    return parse_children(text)
+
+def parse_children(text):
     text_nodes = text_to_textnodes(text)
+    if text_collector is not None:
+        text_collector.add(plain_texts(text_nodes))
 
     children = []
     for node in text_nodes:
@@ -184,70 +297,71 @@ def markdown_to_html(markdown):
     new_nodes = []
 
     for block in blocks:
-        match block_to_block_type(block):
-            case BlockType.PARAGRAPH:
-                children = text_to_children(block.replace('\n', ' '))
-                new_nodes.append(
-                    ParentNode(
-                        'p',
-                        children
-                    )
-                )
-            case BlockType.HEADING:
-                count = block.count('#')
-                new_string = block.strip(r'^#+? ')
+        new_nodes.append(block_to_html_node(block, block_to_block_type(block)))
+    return ParentNode('div', new_nodes)
 
+def iter_html_nodes(lines):
+    for block in iter_blocks(lines):
+        yield block_to_html_node(block, block_to_block_type(block))
+
+def block_to_html_node(block, block_type):
+    match block_type:
+        case BlockType.PARAGRAPH:
+            children = text_to_children(block.replace('\n', ' '))
+            return ParentNode('p', children)
+        case BlockType.HEADING:
+            count = block.count('#')
+            new_string = block.strip(r'^#+? ')
+
+            children = text_to_children(new_string)
+            return ParentNode(f'h{count}', children)
+
+        case BlockType.CODE:
+            lines = block.split('\n')
+            inner_lines = lines[1:-1]
+            new = '\n'.join(inner_lines) + '\n'
+
+            # the info string after the opening fence names the language
+            language = language_for(lines[0][3:]) if len(lines) > 1 else None
+            if language is None:
+                return ParentNode( 'pre', [ LeafNode( 'code', new) ])
+            return ParentNode('pre', [LeafNode('code', highlight(new, language), {'class': f'language-{language}'})])
+
+        case BlockType.QUOTE:
+            lines = block.split('\n')
+            block_children = []
+
+            for l in lines:
+                new_string = l.strip('>')
+                new_string = new_string.strip()
                 children = text_to_children(new_string)
-                parent = ParentNode(f'h{count}', children)
-                new_nodes.append(parent)
-
-            case BlockType.CODE:
-                lines = block.split('\n')
-                inner_lines = lines[1:-1]
-                new = '\n'.join(inner_lines) + '\n'
-                new_nodes.append(
-                    ParentNode( 'pre', [ LeafNode( 'code', new) ])
-                )
-
-            case BlockType.QUOTE:
-                lines = block.split('\n')
-                block_children = []
-
-                for l in lines:
-                    new_string = l.strip('>')
-                    new_string = new_string.strip()
-                    children = text_to_children(new_string)
-                    block_children.extend(children)
-
-                block_parent = ParentNode('blockquote', block_children)
-                new_nodes.append(block_parent)
-
-            case BlockType.UNORDERED_LIST:
-                lines = block.split('\n')
-                block_children = []
-
-                for l in lines:
-                    new_string = l.strip('- ')
-                    children = text_to_children(new_string)
-                    parent = ParentNode('li', children)
-                    block_children.append(parent)
-
-                block_parent = ParentNode('ul', block_children)
-                new_nodes.append(block_parent)
-
-            case BlockType.ORDERED_LIST:
-                lines = block.split('\n')
-                block_children = []
-
-                for l in lines:
-                    new_string = l[3:]
-                    children = text_to_children(new_string)
-                    parent = ParentNode('li', children)
-                    block_children.append(parent)
-
-                block_parent = ParentNode('ol', block_children)
-                new_nodes.append(block_parent)
-
-            case _:
-                raise Exception('Something went wrong when determining block_type')
-    return ParentNode('div', new_nodes)
+                block_children.extend(children)
+
+            return ParentNode('blockquote', block_children)
+
+        case BlockType.UNORDERED_LIST:
+            lines = block.split('\n')
+            block_children = []
+
+            for l in lines:
+                new_string = l.strip('- ')
+                children = text_to_children(new_string)
+                parent = ParentNode('li', children)
+                block_children.append(parent)
+
+            return ParentNode('ul', block_children)
+
+        case BlockType.ORDERED_LIST:
+            lines = block.split('\n')
+            block_children = []
+
+            for l in lines:
+                new_string = l[ORDERED_ITEM_PATTERN.match(l).end():]
+                children = text_to_children(new_string)
+                parent = ParentNode('li', children)
+                block_children.append(parent)
+
+            return ParentNode('ol', block_children)
+
+        case _:
+            raise Exception('Something went wrong when determining block_type')
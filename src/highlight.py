@@ -0,0 +1,176 @@
+import hashlib
+import html
+import os
+import re
+from collections import OrderedDict
+
+# bump whenever tokenizer rules or markup change, cached results are keyed by it
+HIGHLIGHTER_VERSION = '1'
+
+STRING = r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+NUMBER = r'\b(?:0[xXoObB][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:[eE][+-]?\d+)?)\b'
+
+
+def words(text):
+    return r'\b(?:' + '|'.join(text.split()) + r')\b'
+
+RULES = {
+    'python': [
+        ('comment', r'#[^\n]*'),
+        ('string', r'[rRbBuUfF]{0,2}(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|' + STRING + ')'),
+        ('number', NUMBER),
+        ('keyword', words(
+            'False None True and as assert async await break class continue def del elif else except '
+            'finally for from global if import in is lambda nonlocal not or pass raise return try while with yield'
+        )),
+        ('builtin', words('print len range open str int float list dict set tuple isinstance super self')),
+        ('decorator', r'@[\w.]+'),
+    ],
+    'javascript': [
+        ('comment', r'//[^\n]*|/\*[\s\S]*?\*/'),
+        ('string', STRING + r'|`(?:\\.|[^`\\])*`'),
+        ('number', NUMBER),
+        ('keyword', words(
+            'async await break case catch class const continue default delete do else export extends '
+            'false finally for from function if import in instanceof let new null return static super '
+            'switch this throw true try typeof undefined var void while yield interface type'
+        )),
+    ],
+    'bash': [
+        ('comment', r'(?<![\w$])#[^\n]*'),
+        ('string', STRING),
+        ('variable', r'\$\{[^}\n]*\}|\$\w+'),
+        ('keyword', words('if then else elif fi for while until do done case esac function in return export local')),
+    ],
+    'json': [
+        ('property', r'"(?:\\.|[^"\\\n])*"(?=\s*:)'),
+        ('string', r'"(?:\\.|[^"\\\n])*"'),
+        ('number', r'-?' + NUMBER),
+        ('keyword', words('true false null')),
+    ],
+    'css': [
+        ('comment', r'/\*[\s\S]*?\*/'),
+        ('string', STRING),
+        ('keyword', r'@[\w-]+'),
+        ('property', r'[\w-]+(?=\s*:)'),
+        ('number', r'#[0-9a-fA-F]{3,8}\b|-?\d*\.?\d+(?:%|[a-z]+)?'),
+    ],
+    'html': [
+        ('comment', r'<!--[\s\S]*?-->'),
+        ('tag', r'</?[\w:-]+|/?>'),
+        ('property', r'[\w:-]+(?==)'),
+        ('string', STRING),
+    ],
+}
+
+ALIASES = {
+    'py': 'python', 'python3': 'python',
+    'js': 'javascript', 'ts': 'javascript', 'typescript': 'javascript', 'jsx': 'javascript',
+    'sh': 'bash', 'shell': 'bash', 'zsh': 'bash', 'console': 'bash',
+    'xml': 'html', 'svg': 'html',
+}
+
+PATTERNS = {
+    language: re.compile('|'.join(f'(?P<{name}_{i}>{pattern})' for i, (name, pattern) in enumerate(rules)))
+    for language, rules in RULES.items()
+}
+
+
+def language_for(info):
+    # the first word of a fence's info string, e.g. "python" in ```python title="x"
+    parts = info.strip().split()
+    if not parts:
+        return None
+    return parts[0].lower()
+
+def tokenize(code, language):
+    # (token class or None, text) pairs that join back into code
+    pattern = PATTERNS.get(ALIASES.get(language, language))
+    if pattern is None:
+        return [(None, code)]
+
+    tokens = []
+    position = 0
+    for match in pattern.finditer(code):
+        if match.start() > position:
+            tokens.append((None, code[position:match.start()]))
+        tokens.append((match.lastgroup.rsplit('_', 1)[0], match.group()))
+        position = match.end()
+    if position < len(code):
+        tokens.append((None, code[position:]))
+    return tokens
+
+def render_tokens(tokens):
+    parts = []
+    for token_class, text in tokens:
+        text = html.escape(text, quote = False)
+        parts.append(f'<span class="tok-{token_class}">{text}</span>' if token_class else text)
+    return ''.join(parts)
+
+class HighlightCache:
+    # in memory for the build, and on disk to share results between builds and workers.
+    # Memory holds the maxsize most recently used blocks, the disk keeps everything
+    def __init__(self, directory = None, maxsize = 1024):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, language, code):
+        text = '\0'.join([HIGHLIGHTER_VERSION, language, code])
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def remember(self, key, markup):
+        self.entries[key] = markup
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+
+    def get(self, key):
+        markup = self.entries.get(key)
+        if markup is not None:
+            self.entries.move_to_end(key)
+        elif self.directory is not None:
+            try:
+                with open(self.path_for(key), 'r', encoding = 'utf-8') as f:
+                    markup = f.read()
+                self.remember(key, markup)
+            except FileNotFoundError:
+                pass
+        if markup is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return markup
+
+    def put(self, key, markup):
+        self.remember(key, markup)
+        if self.directory is None:
+            return
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            f.write(markup)
+        os.replace(tmp_path, path)
+
+    def __str__(self):
+        return f'{self.hits} hits, {self.misses} misses'
+
+highlight_cache = HighlightCache()
+
+def set_highlight_cache(cache):
+    global highlight_cache
+    highlight_cache = cache
+
+def highlight(code, language):
+    key = highlight_cache.key(language, code)
+    markup = highlight_cache.get(key)
+    if markup is None:
+        markup = render_tokens(tokenize(code, language))
+        highlight_cache.put(key, markup)
+    return markup
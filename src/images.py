@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import struct
+
+from manifest import hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+# JPEG start-of-frame markers, the ones that carry the image size
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(path):
+    # (width, height) from the file header, without decoding any pixels
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return webp_size(head)
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            return jpeg_size(f)
+    return None
+
+def webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+    return None
+
+def jpeg_size(f):
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0xFF:
+            f.seek(-1, 1)
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker[1] in SOF_MARKERS:
+            height, width = struct.unpack('>xHH', f.read(5))
+            return width, height
+        f.seek(struct.unpack('>H', length)[0] - 2, 1)
+
+def variant_name(url, digest, width):
+    root, extension = os.path.splitext(url)
+    return f'{root}.{digest[:10]}-{width}w{extension}'
+
+def make_variant(source, target, width):
+    with Image.open(source) as image:
+        height = round(image.height * width / image.width)
+        image.resize((width, height), Image.LANCZOS).save(target)
+
+class ImageCache:
+    # what every static image measured, keyed by its content hash, plus the size
+    # and mtime of each file so unchanged files are not even hashed again
+    def __init__(self, path, variants_dir):
+        self.path = path
+        self.variants_dir = variants_dir
+        self.files = {}
+        self.entries = {}
+        self.outputs = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.files = data.get('files', {})
+            self.entries = data.get('entries', {})
+            self.outputs = data.get('outputs', [])
+
+    def digest_for(self, path):
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if known is not None and (known['size'], known['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return known['hash']
+        digest = hash_file(path)
+        self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        return digest
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        with open(self.path, 'w') as f:
+            json.dump({'files': self.files, 'entries': self.entries, 'outputs': self.outputs}, f, indent = 1, sort_keys = True)
+
+def process_images(static_dir, output_dir, cache, widths = ()):
+    # measures every image under static_dir and, with widths and Pillow, places
+    # downscaled copies next to it in output_dir. Returns {url: info}
+    images = {}
+    outputs = []
+    seen = set()
+    for directory, _, files in os.walk(static_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(directory, name)
+            url = '/' + os.path.relpath(path, static_dir).replace(os.sep, '/')
+            digest = cache.digest_for(path)
+            seen.add(path)
+
+            entry = cache.entries.get(digest)
+            if entry is None:
+                size = image_size(path)
+                if size is None:
+                    continue
+                entry = cache.entries[digest] = {'width': size[0], 'height': size[1]}
+
+            variants = []
+            if Image is not None:
+                for width in sorted(widths):
+                    if width >= entry['width']:
+                        continue
+                    cached = os.path.join(cache.variants_dir, f'{digest}-{width}w{os.path.splitext(name)[1]}')
+                    if not os.path.exists(cached):
+                        os.makedirs(cache.variants_dir, exist_ok = True)
+                        make_variant(path, cached, width)
+                    variant_url = variant_name(url, digest, width)
+                    target = os.path.join(output_dir, variant_url.lstrip('/'))
+                    if not os.path.exists(target):
+                        os.makedirs(os.path.dirname(target), exist_ok = True)
+                        shutil.copy2(cached, target)
+                    variants.append([variant_url, width])
+                    outputs.append(target)
+
+            images[url] = {'width': entry['width'], 'height': entry['height'], 'variants': variants}
+
+    # variants of images that changed or went away
+    for target in set(cache.outputs) - set(outputs):
+        if os.path.exists(target):
+            os.remove(target)
+    cache.outputs = sorted(outputs)
+    cache.files = {p: e for p, e in cache.files.items() if p in seen}
+    live = {e['hash'] for e in cache.files.values()}
+    cache.entries = {d: e for d, e in cache.entries.items() if d in live}
+    return images
+
+class ImageStage:
+    # the attributes an <img> gets for a static image, see process_images
+    def __init__(self, images, basepath = '/', assets = None):
+        self.images = images
+        self.basepath = basepath
+        self.assets = assets
+
+    def attributes(self, url):
+        attributes = {'loading': 'lazy', 'decoding': 'async'}
+        info = self.images.get(url.split('?', 1)[0].split('#', 1)[0])
+        if info is None:
+            return attributes
+
+        attributes['width'] = str(info['width'])
+        attributes['height'] = str(info['height'])
+        if info['variants']:
+            # srcset is not covered by the href/src rewrite, so basepath and fingerprint are applied here
+            original = self.assets.get(url) if self.assets is not None else url
+            candidates = [f'{self.basepath}{u.lstrip("/")} {w}w' for u, w in info['variants']]
+            candidates.append(f'{self.basepath}{original.lstrip("/")} {info["width"]}w')
+            attributes['srcset'] = ', '.join(candidates)
+            attributes['sizes'] = f'(max-width: {info["width"]}px) 100vw, {info["width"]}px'
+        return attributes
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+class InlineCache:
+    def __init__(self, maxsize = 4096, shared = True):
+        if maxsize < 1:
+            raise ValueError('Inline cache needs room for at least one entry')
+        self.maxsize = maxsize
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def get(self, text):
+        html = self.entries.get(text)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return html
+
+    def put(self, text, html):
+        self.entries[text] = html
+        self.entries.move_to_end(text)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+
+    def start_page(self):
+        # a page-scoped cache only reuses fragments within a single page
+        if not self.shared:
+            self.entries.clear()
+
+    def add_stats(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return f'{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {len(self.entries)}/{self.maxsize} entries'
@@ -0,0 +1,40 @@
+import os
+
+from depgraph import site_path
+from pageindex import url_for
+
+
+class LinkChecker:
+    # resolves internal link and image targets with set lookups instead of
+    # touching the filesystem, so checking a page costs next to nothing
+    def __init__(self, output_dir, static_dir):
+        self.output_dir = output_dir
+        self.static_dir = static_dir
+        self.static = set()
+        for directory, _, files in os.walk(static_dir):
+            for name in files:
+                relative = os.path.relpath(os.path.join(directory, name), static_dir)
+                self.static.add('/' + relative.replace(os.sep, '/'))
+
+    def resolve(self, target, dest_path):
+        # ('asset', static file), ('page', output path) or None for external targets
+        path = site_path(target, url_for(dest_path, self.output_dir))
+        if path is None:
+            return None
+        if path in self.static:
+            return 'asset', os.path.join(self.static_dir, path.lstrip('/'))
+        if path.endswith('/') or not os.path.splitext(path)[1]:
+            return 'page', os.path.normpath(os.path.join(self.output_dir, path.strip('/'), 'index.html'))
+        return 'page', os.path.normpath(os.path.join(self.output_dir, path.lstrip('/')))
+
+    def broken(self, graph):
+        # every reference recorded in the graph whose target is neither a static
+        # file nor an output of the build, as (source, line, target)
+        outputs = set(graph.outputs)
+        broken = []
+        for output, node in graph.outputs.items():
+            for line, target in node.get('references', ()):
+                resolved = self.resolve(target, output)
+                if resolved is not None and resolved[0] == 'page' and resolved[1] not in outputs:
+                    broken.append((node['source'], line, target))
+        return sorted(broken)
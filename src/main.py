@@ -1,7 +1,58 @@
+import argparse
+import cProfile
+import hashlib
+import json
 import os, shutil
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from functions import markdown_to_html
+import functions
+from compress import Precompressor, remove_siblings
+from depgraph import DependencyGraph
+from feeds import GeneratedPages, generate_site_pages
+from fingerprint import AssetMap
+from frontmatter import FENCE, read_front_matter
+from functions import LINK_OR_IMAGE, block_to_block_type, block_to_html_node, iter_html_nodes, markdown_to_blocks, markdown_to_html, set_image_stage, set_inline_cache, set_text_collector
+from htmlnode import ParentNode
+import highlight
+from highlight import HighlightCache, set_highlight_cache
+from images import Image, ImageCache, ImageStage, process_images
+from inline_cache import InlineCache
+from linkcheck import LinkChecker
+from manifest import BuildManifest, hash_file
+from minify import Minifier, minify_html
+from pageindex import PageIndex, entry_from_meta
+from profiling import BuildProfile, StageTimer, count_nodes
+from render_cache import RenderCache
+from search import SearchIndex, TextCollector
+from sync import LINK_MODES, sync_directory
+from template import load_template
+from watch import Watcher, serve_directory
+
+CONTENT_DIR = './content'
+STATIC_DIR = 'static'
+OUTPUT_DIR = './docs'
+TEMPLATE_PATH = 'template.html'
+LAYOUTS_DIR = 'layouts'
+MANIFEST_PATH = '.build/manifest.json'
+INDEX_PATH = '.build/index.json'
+GENERATED_PATH = '.build/generated.json'
+GRAPH_PATH = '.build/graph.json'
+RENDER_CACHE_DIR = '.build/render-cache'
+HIGHLIGHT_CACHE_DIR = '.build/highlight-cache'
+IMAGES_PATH = '.build/images.json'
+IMAGE_VARIANTS_DIR = '.build/image-variants'
+ASSETS_PATH = '.build/assets.json'
+COMPRESSED_PATH = '.build/compressed.json'
+SEARCH_PATH = '.build/search.json'
+CODE_SPAN = re.compile(r'`[^`]*`')
+
+render_cache = None
+asset_map = None
+precompressor = None
+minify_output = False
 
 
 def copy_item(source_path, item_name, target_path):
@@ -17,7 +68,7 @@ def copy_item(source_path, item_name, target_path):
         for item in os.listdir(full_source_path):
             copy_item(full_source_path, item, full_target_path)
 
-def initiate_directory_copy(source_dir, target_dir):
+def initiate_directory_copy(source_dir, target_dir, clean = True):
     current = '.'
     full_source_path = os.path.abspath(os.path.join(current, source_dir))
     full_target_path = os.path.abspath(os.path.join(current, target_dir))
@@ -25,10 +76,11 @@ def initiate_directory_copy(source_dir, target_dir):
     if not os.path.exists(full_source_path):
         raise Exception('Source directory does not exist')
 
-    if os.path.exists(full_target_path):
+    if clean and os.path.exists(full_target_path):
         shutil.rmtree(full_target_path)
 
-    os.mkdir(target_dir)
+    if not os.path.exists(full_target_path):
+        os.mkdir(target_dir)
 
     for item in os.listdir(full_source_path):
         copy_item(full_source_path, item, full_target_path)
@@ -44,53 +96,833 @@ def extract_title(markdown):
             return ree
     raise Exception('No header was found')
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f'Generating page from {from_path} to {dest_path} using {template_path}')
+class TitleScanner:
+    # passes lines through while looking for the title the way extract_title does
+    def __init__(self, lines):
+        self.lines = lines
+        self.title = None
+
+    def __iter__(self):
+        for line in self.lines:
+            if self.title is None and line.startswith('# '):
+                self.title = line.replace('#', '').strip()
+            yield line
+
+class ReferenceScanner:
+    # passes the raw file through while collecting the line and target of every
+    # link and image, using the inline lexer's pattern outside front matter and code
+    def __init__(self, lines):
+        self.lines = lines
+        self.targets = []
+
+    def __iter__(self):
+        front_matter = fenced = False
+        for number, line in enumerate(self.lines, 1):
+            if number == 1 and line.rstrip() == FENCE:
+                front_matter = True
+            elif front_matter:
+                front_matter = line.rstrip() != FENCE
+            elif line.startswith('```'):
+                fenced = not fenced
+            elif not fenced and '](' in line:
+                text = CODE_SPAN.sub('', line) if '`' in line else line
+                self.targets.extend((number, match.group(3)) for match in LINK_OR_IMAGE.finditer(text))
+            yield line
+
+class BlockStream:
+    def __init__(self, pending, nodes):
+        self.pending = pending
+        self.nodes = nodes
+
+    def write_html(self, write):
+        write('<div>')
+        for node in self.pending:
+            node.write_html(write)
+        for node in self.nodes:
+            node.write_html(write)
+        write('</div>')
+
+def layout_for(from_path, meta, template_path):
+    # front matter picks a layout by name, otherwise the nearest
+    # layouts/<directory>.html for the page's directory, otherwise the default
+    if 'layout' in meta:
+        return os.path.join(LAYOUTS_DIR, meta['layout'] + '.html')
+
+    if is_inside(from_path, CONTENT_DIR):
+        directory = os.path.dirname(os.path.relpath(from_path, CONTENT_DIR))
+        while directory:
+            candidate = os.path.join(LAYOUTS_DIR, directory + '.html')
+            if os.path.exists(candidate):
+                return candidate
+            directory = os.path.dirname(directory)
+    return template_path
+
+def page_template(from_path, template_path, basepath):
+    with open(from_path, 'r') as from_file:
+        meta, _ = read_front_matter(from_file)
+    return load_template(layout_for(from_path, meta, template_path), basepath, asset_map)
+
+def generate_page(from_path, template_path, dest_path, basepath, profile = None):
+    if functions.inline_cache is not None:
+        functions.inline_cache.start_page()
+    if functions.text_collector is not None:
+        functions.text_collector.start_page()
+
+    with open(from_path, 'r') as from_file:
+        references = ReferenceScanner(from_file)
+        meta, lines = read_front_matter(references)
+        layout_path = layout_for(from_path, meta, template_path)
+        print(f'Generating page from {from_path} to {dest_path} using {layout_path}')
+        template = load_template(layout_path, basepath, asset_map)
+        dependencies = {'templates': template.dependencies, 'targets': references.targets}
+
+        if profile is not None:
+            title = generate_page_profiled(from_path, lines, meta, template, dest_path, profile)
+            return page_result(meta, title, dependencies)
+        if render_cache is not None:
+            title = generate_page_cached(from_path, lines, meta, template, dest_path, basepath, references)
+            return page_result(meta, title, dependencies)
 
-    from_file = open(from_path, 'r')
-    md = from_file.read()
-    from_file.close()
+        lines = TitleScanner(lines)
+        nodes = iter_html_nodes(lines)
 
-    template_file = open(template_path)
-    template = template_file.read()
-    template_file.close()
+        # without a front matter title, blocks before the heading have to wait,
+        # everything after it streams
+        title = meta.get('title')
+        pending = []
+        if title is None:
+            for node in nodes:
+                pending.append(node)
+                if lines.title is not None:
+                    break
+            if lines.title is None:
+                raise Exception('No header was found')
+            title = lines.title
+
+        tmp_path = dest_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as target_file:
+                # compressed siblings are produced from the same fragments, not from a re-read
+                tee = precompressor.tee(target_file.write) if precompressor is not None else None
+                write = tee.write if tee is not None else target_file.write
+                minifier = Minifier(write) if minify_output else None
+                template.write(minifier.write if minifier is not None else write, title, BlockStream(pending, nodes))
+                if minifier is not None:
+                    minifier.close()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, dest_path)
+    if tee is not None:
+        precompressor.finish(dest_path, tee)
+    return page_result(meta, title, dependencies)
+
+def page_result(meta, title, dependencies):
+    collector = functions.text_collector
+    dependencies['terms'] = collector.terms() if collector is not None else None
+    return entry_from_meta(meta, title), dependencies
+
+def page_references(from_path):
+    # the (line, target) pairs generate_page collects, without rendering
+    with open(from_path, 'r') as from_file:
+        references = ReferenceScanner(from_file)
+        for _ in references:
+            pass
+    return references.targets
+
+def stage_digest(targets):
+    # fingerprinted names and image attributes end up in the page without being
+    # part of its source, only the ones for its own links and images count
+    stage = functions.image_stage
+    if asset_map is None and stage is None:
+        return None
+    urls = sorted({target.split('?', 1)[0].split('#', 1)[0] for _, target in targets})
+    if not urls:
+        return None
+    used = [
+        [url, asset_map.get(url) if asset_map is not None else None, stage.attributes(url) if stage is not None else None]
+        for url in urls
+    ]
+    return hashlib.sha256(json.dumps(used, sort_keys = True).encode('utf-8')).hexdigest()
+
+def generate_page_cached(from_path, lines, meta, template, dest_path, basepath, references):
+    md = ''.join(lines)
+    title = meta.get('title') or extract_title(md)
+
+    digests = [d for d in (stage_digest(references.targets), 'minify' if minify_output else None) if d is not None]
+    key = render_cache.key(hash_file(from_path), template.digest, basepath, '\0'.join(digests) or None)
+    html = render_cache.get(key)
+    if html is None:
+        parts = []
+        template.write(parts.append, title, markdown_to_html(md))
+        html = ''.join(parts)
+        if minify_output:
+            html = minify_html(html)
+        render_cache.put(key, html)
+    elif functions.text_collector is not None:
+        functions.text_collector.skip_page()
+
+    with open(dest_path, 'w') as target_file:
+        target_file.write(html)
+    if precompressor is not None:
+        precompressor.write_text(dest_path, html)
+    return title
+
+def generate_page_profiled(from_path, lines, meta, template, dest_path, profile):
+    # same output as generate_page, but every stage runs on its own so it can be timed
+    timer = StageTimer()
+    md = ''.join(lines)
+    timer.lap('read')
+
+    title = meta.get('title') or extract_title(md)
+    blocks = markdown_to_blocks(md)
+    timer.lap('block split')
+
+    block_types = [block_to_block_type(block) for block in blocks]
+    timer.lap('classify')
+
+    html_nodes = ParentNode('div', [block_to_html_node(b, t) for b, t in zip(blocks, block_types)])
+    timer.lap('inline parse')
 
-    title = extract_title(md)
-    html_nodes = markdown_to_html(md)
     html = html_nodes.to_html()
+    timer.lap('serialize')
+
+    content = template.render(title, html)
+    timer.lap('template fill')
+
+    if minify_output:
+        content = minify_html(content)
+    timer.lap('minify')
 
-    content = template.replace('{{ Title }}', title)
-    content = content.replace('{{ Content }}', html)
-    content = content.replace('href="/', f'href="{basepath}')
-    content = content.replace('src="/', f'src="{basepath}')
+    with open(dest_path, 'w') as target_file:
+        target_file.write(content)
+    if precompressor is not None:
+        precompressor.write_text(dest_path, content)
+    timer.lap('write')
+
+    profile.add(from_path, timer, count_nodes(html_nodes), len(content.encode('utf-8')))
+    return title
+
+def collect_pages(dir_path_content, dest_dir_path, pages = None):
+    if pages is None:
+        pages = []
 
-    target_file = open(dest_path, 'w')
-    target_file.write(content)
-    target_file.close()
- 
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath):
     for item in os.listdir(dir_path_content):
         item_path = os.path.join(dir_path_content, item)
         destination_path = os.path.join(dest_dir_path, item)
         if os.path.isfile(item_path):
             print(item_path, 'is a file')
-            generate_page(item_path, template_path, destination_path.replace('.md', '.html'), basepath)
+            pages.append((item_path, destination_path.replace('.md', '.html')))
         else:
             if not os.path.exists(destination_path):
                 os.mkdir(destination_path)
-            generate_page_recursive(item_path, template_path, destination_path, basepath)
+            collect_pages(item_path, destination_path, pages)
+    return pages
 
+def worker_settings():
+    cache = functions.inline_cache
+    return {
+        'inline_cache': (cache.maxsize, cache.shared) if cache is not None else None,
+        'render_cache': (render_cache.directory, render_cache.max_bytes) if render_cache is not None else None,
+        'assets': asset_map.urls if asset_map is not None else None,
+        'highlight_cache': highlight.highlight_cache.directory,
+        'images': (functions.image_stage.images, functions.image_stage.basepath) if functions.image_stage is not None else None,
+        'precompress': (precompressor.digests, precompressor.use_brotli) if precompressor is not None else None,
+        'minify': minify_output,
+        'search': functions.text_collector is not None,
+    }
 
+def configure_worker(settings):
+    global render_cache, asset_map, precompressor, minify_output
+    if settings['inline_cache'] is not None:
+        set_inline_cache(InlineCache(*settings['inline_cache']))
+    if settings['render_cache'] is not None:
+        render_cache = RenderCache(*settings['render_cache'])
+    if settings['assets'] is not None:
+        asset_map = AssetMap(settings['assets'])
+    set_highlight_cache(HighlightCache(settings['highlight_cache']))
+    if settings['images'] is not None:
+        set_image_stage(ImageStage(*settings['images'], asset_map))
+    if settings['precompress'] is not None:
+        digests, use_brotli = settings['precompress']
+        precompressor = Precompressor(digests = digests, use_brotli = use_brotli)
+    minify_output = settings['minify']
+    if settings['search']:
+        set_text_collector(TextCollector())
 
-def main():
-    print(sys.argv[1])
-    initiate_directory_copy('static', 'docs')
-    generate_page_recursive(
-        './content', 
-        'template.html', 
-        './docs', 
-        f'{sys.argv[1] if sys.argv and sys.argv[1] else '/'}'
+def render_chunk(chunk, template_path, basepath, profiled = False):
+    profile = BuildProfile() if profiled else None
+    cache = functions.inline_cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    render_hits, render_misses = (render_cache.hits, render_cache.misses) if render_cache is not None else (0, 0)
+    written, skipped = (precompressor.written, precompressor.skipped) if precompressor is not None else (0, 0)
+    highlight_hits, highlight_misses = highlight.highlight_cache.hits, highlight.highlight_cache.misses
+
+    results = []
+    for from_path, dest_path in chunk:
+        try:
+            entry, dependencies = generate_page(from_path, template_path, dest_path, basepath, profile)
+            results.append((from_path, dest_path, None, entry, dependencies))
+        except Exception as e:
+            results.append((from_path, dest_path, f'{type(e).__name__}: {e}', None, None))
+
+    return {
+        'results': results,
+        'profile': profile.pages if profile is not None else [],
+        'inline_cache': (cache.hits - hits, cache.misses - misses) if cache is not None else (0, 0),
+        'render_cache': (
+            (render_cache.hits - render_hits, render_cache.misses - render_misses)
+            if render_cache is not None else (0, 0)
+        ),
+        'precompress': (
+            (precompressor.take_updates(), precompressor.written - written, precompressor.skipped - skipped)
+            if precompressor is not None else ({}, 0, 0)
+        ),
+        'highlight_cache': (highlight.highlight_cache.hits - highlight_hits, highlight.highlight_cache.misses - highlight_misses),
+    }
+
+def render_parallel(pages, template_path, basepath, jobs, profile = None):
+    # a few chunks per worker keeps the pool busy when page sizes vary
+    chunk_size = max(1, -(-len(pages) // (jobs * 4)))
+    chunks = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+    cache = functions.inline_cache
+
+    results = []
+    with ProcessPoolExecutor(max_workers = jobs, initializer = configure_worker, initargs = (worker_settings(),)) as pool:
+        futures = [pool.submit(render_chunk, chunk, template_path, basepath, profile is not None) for chunk in chunks]
+        for future in futures:
+            chunk = future.result()
+            results.extend(chunk['results'])
+            if profile is not None:
+                profile.merge(chunk['profile'])
+            if cache is not None:
+                cache.add_stats(*chunk['inline_cache'])
+            if render_cache is not None:
+                render_cache.hits += chunk['render_cache'][0]
+                render_cache.misses += chunk['render_cache'][1]
+            if precompressor is not None:
+                precompressor.merge(*chunk['precompress'])
+            highlight.highlight_cache.hits += chunk['highlight_cache'][0]
+            highlight.highlight_cache.misses += chunk['highlight_cache'][1]
+    return results
+
+def generate_page_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest = None, jobs = 1, profile = None, index = None, graph = None, search = None):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    outputs = [dest_path for _, dest_path in pages]
+    if index is not None:
+        index.retain(outputs)
+
+    reasons = None
+    if graph is not None:
+        if manifest is not None:
+            current = {os.path.normpath(o) for o in outputs}
+            added = [o for o in outputs if not graph.has(o)]
+            removed = [o for o, node in graph.outputs.items() if node['source'] is not None and o not in current]
+            reasons = graph.rebuild_set(graph.changed_files(), added, removed)
+        graph.retain(outputs)
+    return render_pages(pages, template_path, basepath, manifest, jobs, profile, index, graph, reasons, search)
+
+def page_dependencies(from_path, dest_path, dependencies, checker):
+    # internal targets that exist in static/ are assets, anything else is another output
+    files = [from_path] + dependencies['templates']
+    links = []
+    for _, target in dependencies['targets']:
+        resolved = checker.resolve(target, dest_path)
+        if resolved is None:
+            continue
+        kind, path = resolved
+        (files if kind == 'asset' else links).append(path)
+    return files, links
+
+def precompression():
+    # recorded per page, so turning --precompress on or off rebuilds pages
+    if precompressor is None:
+        return None
+    return 'gzip+brotli' if precompressor.use_brotli else 'gzip'
+
+def render_pages(pages, template_path, basepath, manifest = None, jobs = 1, profile = None, index = None, graph = None, reasons = None, search = None):
+    entries = {}
+    reasons = dict(reasons or {})
+    errors = []
+    if manifest is not None:
+        pending = []
+        for from_path, dest_path in pages:
+            # a missing layout or broken front matter fails this page here, like it would while rendering
+            try:
+                template = page_template(from_path, template_path, basepath)
+                stages = stage_digest(page_references(from_path)) if asset_map is not None or functions.image_stage is not None else None
+                entry = manifest.entry_for(from_path, template.digest, basepath, minify_output, precompression(), stages)
+            except Exception as e:
+                errors.append((from_path, f'{type(e).__name__}: {e}'))
+                continue
+            # the graph can ask for pages whose own inputs look unchanged, e.g. when a link target went away
+            forced = os.path.normpath(dest_path) in reasons
+            if manifest.is_fresh(dest_path, entry) and not forced and (index is None or index.has(dest_path)) and (graph is None or graph.has(dest_path)):
+                print(f'Skipping {from_path}, unchanged')
+                if graph is not None:
+                    graph.refresh(dest_path)
+                continue
+            entries[dest_path] = entry
+            if precompressor is None and manifest.pages.get(os.path.normpath(dest_path), {}).get('precompress'):
+                # siblings from an earlier --precompress build would go stale
+                remove_siblings(dest_path)
+            reasons.setdefault(os.path.normpath(dest_path), manifest.change_reason(dest_path, entry))
+            pending.append((from_path, dest_path))
+        pages = pending
+
+    if jobs > 1:
+        results = render_parallel(pages, template_path, basepath, jobs, profile)
+    else:
+        results = []
+        for from_path, dest_path in pages:
+            # one bad page must not lose the state of the pages rendered before it
+            try:
+                page_entry, dependencies = generate_page(from_path, template_path, dest_path, basepath, profile)
+                results.append((from_path, dest_path, None, page_entry, dependencies))
+            except Exception as e:
+                results.append((from_path, dest_path, f'{type(e).__name__}: {e}', None, None))
+
+    checker = LinkChecker(OUTPUT_DIR, STATIC_DIR) if graph is not None else None
+    for from_path, dest_path, error, page_entry, dependencies in results:
+        if error is not None:
+            errors.append((from_path, error))
+            continue
+        if manifest is not None:
+            manifest.record(dest_path, entries[dest_path])
+        if index is not None:
+            index.update(from_path, dest_path, page_entry)
+        if graph is not None:
+            files, links = page_dependencies(from_path, dest_path, dependencies, checker)
+            reason = reasons.get(os.path.normpath(dest_path), 'full build')
+            graph.record(dest_path, from_path, files, links, reason = reason, references = dependencies['targets'])
+        if search is not None:
+            digest = entries[dest_path]['source_hash'] if dest_path in entries else None
+            search.update(from_path, dest_path, dependencies['terms'], digest)
+    return errors
+
+def collect_terms(from_path):
+    # postings for a page that was not parsed this build, e.g. a render cache hit
+    with open(from_path, 'r') as from_file:
+        _, lines = read_front_matter(from_file)
+        collector = functions.text_collector
+        collector.start_page()
+        markdown_to_html(''.join(lines))
+    return collector.terms()
+
+def output_path_for(source_path):
+    relative = os.path.relpath(source_path, CONTENT_DIR)
+    return os.path.join(OUTPUT_DIR, relative).replace('.md', '.html')
+
+def is_inside(path, directory):
+    return os.path.normpath(path).startswith(os.path.normpath(directory) + os.sep)
+
+def rebuild_changes(changed, removed, basepath, manifest, index, graph):
+    added_outputs = [output_path_for(p) for p in changed if is_inside(p, CONTENT_DIR) and not graph.has(output_path_for(p))]
+    removed_outputs = [output_path_for(p) for p in removed if is_inside(p, CONTENT_DIR)]
+    reasons = graph.rebuild_set(changed + removed, added_outputs, removed_outputs)
+    known = graph.files()
+
+    for path in removed:
+        if is_inside(path, CONTENT_DIR):
+            print(f'Removing {output_path_for(path)}, source is gone')
+            manifest.remove(output_path_for(path), OUTPUT_DIR)
+            index.discard(output_path_for(path))
+            graph.discard(output_path_for(path))
+        elif is_inside(path, STATIC_DIR):
+            target = os.path.join(OUTPUT_DIR, os.path.relpath(path, STATIC_DIR))
+            if os.path.exists(target):
+                os.remove(target)
+
+    for path in changed:
+        if is_inside(path, STATIC_DIR):
+            target = os.path.join(OUTPUT_DIR, os.path.relpath(path, STATIC_DIR))
+            os.makedirs(os.path.dirname(target), exist_ok = True)
+            shutil.copy(path, target)
+
+    layouts = [p for p in changed + removed if p == TEMPLATE_PATH or is_inside(p, LAYOUTS_DIR)]
+    if any(os.path.normpath(p) not in known for p in layouts):
+        # a new layout can take over pages that never depended on it, the
+        # manifest skips every page whose template hash did not really change
+        pages = collect_pages(CONTENT_DIR, OUTPUT_DIR)
+    else:
+        sources = {os.path.normpath(p) for p in changed if is_inside(p, CONTENT_DIR)}
+        sources.update(graph.outputs[o]['source'] for o in reasons if o in graph.outputs and graph.outputs[o]['source'])
+        pages = [(p, output_path_for(p)) for p in sorted(sources) if os.path.exists(p)]
+        for _, dest_path in pages:
+            os.makedirs(os.path.dirname(dest_path), exist_ok = True)
+
+    errors = render_pages(pages, TEMPLATE_PATH, basepath, manifest, index = index, graph = graph, reasons = reasons)
+    return len(pages), errors
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog = 'main.py')
+    parser.add_argument('basepath', nargs = '?', default = '/')
+    parser.add_argument(
+        '--incremental',
+        action = 'store_true',
+        help = f'keep docs/ and only re-render pages whose inputs changed (state in {MANIFEST_PATH})'
+    )
+    parser.add_argument(
+        '--jobs',
+        type = int,
+        default = 1,
+        metavar = 'N',
+        help = 'render pages in N worker processes, 0 uses every CPU core'
+    )
+    parser.add_argument(
+        '--checksum',
+        action = 'store_true',
+        help = 'with --incremental, compare static files by content hash instead of size and mtime'
+    )
+    parser.add_argument(
+        '--link-mode',
+        choices = LINK_MODES,
+        default = 'copy',
+        help = 'with --incremental, hardlink or reflink static files into docs/ where the filesystem allows'
+    )
+    parser.add_argument(
+        '--fingerprint',
+        action = 'store_true',
+        help = 'copy static files as name.<hash>.ext and point pages at the new names, so they can be cached forever'
+    )
+    parser.add_argument(
+        '--precompress',
+        action = 'store_true',
+        help = 'write .gz siblings, and .br ones when brotli is installed, for pages and text assets'
+    )
+    parser.add_argument(
+        '--minify',
+        action = 'store_true',
+        help = 'collapse whitespace, drop comments and optional attribute quotes in pages, <pre> blocks stay as written'
+    )
+    parser.add_argument(
+        '--search',
+        action = 'store_true',
+        help = 'write a full-text index of the page text to docs/search/, split into files by term prefix'
+    )
+    parser.add_argument(
+        '--image-attributes',
+        action = 'store_true',
+        help = 'give images width and height from their headers plus loading="lazy" and decoding="async"'
+    )
+    parser.add_argument(
+        '--image-widths',
+        type = lambda text: [int(w) for w in text.split(',')],
+        default = [],
+        metavar = 'W,W',
+        help = 'with Pillow installed, also write downscaled copies at these widths and a srcset (implies --image-attributes)'
+    )
+    parser.add_argument(
+        '--inline-cache',
+        type = int,
+        default = 0,
+        metavar = 'N',
+        help = 'cache the rendered HTML of up to N repeated inline strings, 0 disables the cache'
+    )
+    parser.add_argument(
+        '--inline-cache-scope',
+        choices = ('build', 'page'),
+        default = 'build',
+        help = 'share cached fragments between pages of the build, or only within a page'
+    )
+    parser.add_argument(
+        '--render-cache',
+        nargs = '?',
+        const = RENDER_CACHE_DIR,
+        metavar = 'DIR',
+        help = f'reuse rendered pages from a content-addressed cache directory (default {RENDER_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--render-cache-size',
+        type = int,
+        default = 512,
+        metavar = 'MB',
+        help = 'evict the least recently used cached pages above this size'
+    )
+    parser.add_argument(
+        '--highlight-cache',
+        nargs = '?',
+        const = HIGHLIGHT_CACHE_DIR,
+        metavar = 'DIR',
+        help = f'keep highlighted code blocks on disk so later builds reuse them (default {HIGHLIGHT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--profile',
+        action = 'store_true',
+        help = 'time every page stage and print the slowest pages and a stage breakdown'
+    )
+    parser.add_argument(
+        '--listing',
+        action = 'append',
+        default = [],
+        metavar = 'SECTION',
+        help = 'generate paginated, newest first listing pages for a content section, e.g. blog'
+    )
+    parser.add_argument('--tags', action = 'store_true', help = 'generate tags/ and a listing page per front matter tag')
+    parser.add_argument(
+        '--site-url',
+        metavar = 'URL',
+        help = 'generate sitemap.xml and feed.xml with absolute links under URL'
+    )
+    parser.add_argument(
+        '--strict-links',
+        action = 'store_true',
+        help = 'fail the build when a page links to a page or image that does not exist'
+    )
+    parser.add_argument('--per-page', type = int, default = 10, metavar = 'N', help = 'entries per listing page')
+    parser.add_argument('--profile-json', metavar = 'FILE', help = 'save the --profile data as JSON')
+    parser.add_argument(
+        '--cprofile',
+        metavar = 'FILE',
+        help = 'save a cProfile dump of the build, worker processes are not included'
+    )
+    return parser.parse_args(argv)
+
+def report_errors(errors):
+    for from_path, error in errors:
+        print(f'Failed to generate {from_path}: {error}', file = sys.stderr)
+
+def report_broken_links(graph):
+    broken = LinkChecker(OUTPUT_DIR, STATIC_DIR).broken(graph)
+    for source, line, target in broken:
+        print(f'{source}:{line}: broken link to {target}', file = sys.stderr)
+    return broken
+
+def record_generated(graph, generated, template, removed):
+    for output in removed:
+        graph.discard(output)
+    for output in generated.current:
+        if output in generated.updated or not graph.has(output):
+            reason = 'the page index or the layout changed'
+        else:
+            reason = graph.outputs[output]['reason']
+        graph.record(output, None, template.dependencies, index = True, reason = reason)
+
+def build_command(argv):
+    global render_cache, asset_map, precompressor, minify_output
+    args = parse_args(argv)
+    print(args.basepath)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    profile = BuildProfile() if args.profile or args.profile_json else None
+    # every setting is assigned, so a second build in the same process does not inherit the last one's
+    set_inline_cache(InlineCache(args.inline_cache, shared = args.inline_cache_scope == 'build') if args.inline_cache else None)
+    render_cache = RenderCache(args.render_cache, args.render_cache_size * 1024 * 1024) if args.render_cache else None
+    set_highlight_cache(HighlightCache(args.highlight_cache))
+    minify_output = args.minify
+    set_text_collector(TextCollector() if args.search else None)
+    asset_map = None
+    set_image_stage(None)
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+
+    manifest = BuildManifest(MANIFEST_PATH) if args.incremental else None
+    fingerprints = {} if args.fingerprint else None
+    precompressor = Precompressor(COMPRESSED_PATH) if args.precompress else None
+    if manifest is None and os.path.exists(MANIFEST_PATH):
+        # docs/ is rewritten without recording what went into it, the next
+        # --incremental build must not trust entries for the old pages and static files
+        os.remove(MANIFEST_PATH)
+    if manifest is None and fingerprints is None and precompressor is None:
+        initiate_directory_copy(STATIC_DIR, OUTPUT_DIR)
+    else:
+        if manifest is None and os.path.exists(OUTPUT_DIR):
+            shutil.rmtree(OUTPUT_DIR)
+        stats = sync_directory(
+            STATIC_DIR,
+            OUTPUT_DIR,
+            manifest,
+            args.checksum,
+            args.link_mode,
+            max(jobs, 4),
+            fingerprints,
+            precompressor
+        )
+        print(f'Synced {STATIC_DIR}: {stats}')
+    if fingerprints is not None:
+        asset_map = AssetMap(fingerprints)
+        asset_map.save(ASSETS_PATH)
+        print(f'Fingerprinted {len(fingerprints)} static files, names in {ASSETS_PATH}')
+    if args.image_attributes or args.image_widths:
+        if args.image_widths and Image is None:
+            print('Pillow is not installed, images keep a single size', file = sys.stderr)
+        image_cache = ImageCache(IMAGES_PATH, IMAGE_VARIANTS_DIR)
+        images = process_images(STATIC_DIR, OUTPUT_DIR, image_cache, args.image_widths)
+        image_cache.save()
+        set_image_stage(ImageStage(images, args.basepath or '/', asset_map))
+
+    index = PageIndex(INDEX_PATH, OUTPUT_DIR)
+    graph = DependencyGraph(GRAPH_PATH)
+    search = SearchIndex(SEARCH_PATH) if args.search else None
+    errors = generate_page_recursive(
+        CONTENT_DIR, 
+        TEMPLATE_PATH, 
+        OUTPUT_DIR, 
+        args.basepath or '/',
+        manifest,
+        jobs,
+        profile,
+        index,
+        graph,
+        search
+    )
+    index.save()
+
+    if search is not None:
+        failed = {os.path.normpath(from_path) for from_path, _ in errors}
+        for source_path, dest_path in search.missing(index):
+            if source_path not in failed:
+                search.update(source_path, dest_path, collect_terms(source_path))
+        search.write(OUTPUT_DIR, index, args.basepath or '/', precompressor)
+        search.save()
+        print(f'Search index: {search}')
+
+    if args.listing or args.tags or args.site_url:
+        generated = GeneratedPages(GENERATED_PATH, precompressor, args.minify)
+        template = load_template(TEMPLATE_PATH, args.basepath or '/', asset_map)
+        removed = generate_site_pages(
+            index,
+            template,
+            OUTPUT_DIR,
+            generated,
+            args.listing,
+            args.tags,
+            args.site_url,
+            args.basepath or '/',
+            args.per_page
+        )
+        print(f'Generated pages: {generated.written} written, {generated.unchanged} unchanged, {len(removed)} removed')
+        record_generated(graph, generated, template, removed)
+
+    if functions.inline_cache is not None:
+        print(f'Inline cache: {functions.inline_cache}')
+    if render_cache is not None:
+        print(f'Render cache: {render_cache}, evicted {render_cache.evict()} entries')
+    if precompressor is not None:
+        print(f'Precompressed pages: {precompressor}')
+    if highlight.highlight_cache.hits or highlight.highlight_cache.misses:
+        print(f'Highlight cache: {highlight.highlight_cache}')
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        print(f'Saved cProfile data to {args.cprofile}')
+    if profile is not None:
+        print(profile.report())
+        if args.profile_json:
+            profile.save_json(args.profile_json)
+            print(f'Saved profile to {args.profile_json}')
+
+    if manifest is not None:
+        for removed in manifest.remove_stale(OUTPUT_DIR):
+            print(f'Removed {removed}, source is gone')
+            graph.discard(removed)
+            if precompressor is not None:
+                precompressor.forget(removed)
+        manifest.save()
+    graph.save()
+    if precompressor is not None:
+        precompressor.save()
+
+    broken = report_broken_links(graph)
+
+    if errors:
+        report_errors(errors)
+        sys.exit(1)
+    if broken and args.strict_links:
+        print(f'{len(broken)} broken link(s)', file = sys.stderr)
+        sys.exit(1)
+
+def watch_command(argv):
+    parser = argparse.ArgumentParser(prog = 'main.py watch')
+    parser.add_argument('basepath', nargs = '?', default = '/')
+    parser.add_argument('--port', type = int, default = 8888)
+    parser.add_argument(
+        '--host',
+        default = '127.0.0.1',
+        help = 'address to serve on, e.g. 0.0.0.0 to make the site reachable from other machines'
     )
+    parser.add_argument('--interval', type = float, default = 0.2, help = 'seconds between polls')
+    args = parser.parse_args(argv)
+
+    manifest = BuildManifest(MANIFEST_PATH)
+    print(f'Synced {STATIC_DIR}: {sync_directory(STATIC_DIR, OUTPUT_DIR, manifest)}')
+    index = PageIndex(INDEX_PATH, OUTPUT_DIR)
+    graph = DependencyGraph(GRAPH_PATH)
+    errors = generate_page_recursive(CONTENT_DIR, TEMPLATE_PATH, OUTPUT_DIR, args.basepath, manifest, index = index, graph = graph)
+    report_errors(errors)
+    for removed in manifest.remove_stale(OUTPUT_DIR):
+        graph.discard(removed)
+    manifest.save()
+    index.save()
+    graph.save()
+    report_broken_links(graph)
+
+    server = serve_directory(OUTPUT_DIR, args.port, args.host)
+    print(f'Serving {OUTPUT_DIR} at http://{args.host}:{args.port}/, watching for changes')
+
+    watcher = Watcher([CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH, LAYOUTS_DIR])
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed, removed = watcher.changes()
+            if not changed and not removed:
+                continue
+
+            start = time.perf_counter()
+            try:
+                count, errors = rebuild_changes(changed, removed, args.basepath, manifest, index, graph)
+            except Exception as e:
+                print(f'Rebuild failed: {type(e).__name__}: {e}', file = sys.stderr)
+                continue
+            manifest.save()
+            index.save()
+            graph.save()
+            print(f'Rebuilt {count} page(s) in {(time.perf_counter() - start) * 1000:.1f} ms')
+            report_errors(errors)
+            report_broken_links(graph)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+def cache_command(argv):
+    parser = argparse.ArgumentParser(prog = 'main.py cache')
+    parser.add_argument('action', choices = ('export', 'import'))
+    parser.add_argument('archive', help = 'a .tar.gz file, e.g. a CI artifact')
+    parser.add_argument('--dir', default = RENDER_CACHE_DIR, help = 'the render cache directory')
+    args = parser.parse_args(argv)
+
+    cache = RenderCache(args.dir)
+    if args.action == 'export':
+        cache.export(args.archive)
+        print(f'Exported {len(cache.entries())} cached pages to {args.archive}')
+    else:
+        cache.import_archive(args.archive)
+        print(f'Imported {args.archive}, the cache now holds {len(cache.entries())} pages')
+
+def why_command(argv):
+    parser = argparse.ArgumentParser(prog = 'main.py why', description = 'explain why an output was built and what it depends on')
+    parser.add_argument('path', help = f'an output under {OUTPUT_DIR} or a source under {CONTENT_DIR}')
+    args = parser.parse_args(argv)
+
+    output = output_path_for(args.path) if is_inside(args.path, CONTENT_DIR) else args.path
+    for line in DependencyGraph(GRAPH_PATH).explain(output):
+        print(line)
+
+COMMANDS = {
+    'build': build_command,
+    'watch': watch_command,
+    'cache': cache_command,
+    'why': why_command,
+}
+
+def main():
+    argv = sys.argv[1:]
+    command = 'build'
+    if argv and argv[0] in COMMANDS:
+        command = argv.pop(0)
+    COMMANDS[command](argv)
 
 if __name__ == '__main__':
     main()
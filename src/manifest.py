@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+
+from compress import remove_siblings
+from render_cache import GENERATOR_VERSION
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class BuildManifest:
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.static = {}
+        self.seen = set()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != MANIFEST_VERSION:
+            return
+        self.pages = data.get('pages', {})
+        self.static = data.get('static', {})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            data = {'version': MANIFEST_VERSION, 'pages': self.pages, 'static': self.static}
+            json.dump(data, f, indent = 1, sort_keys = True)
+        os.replace(tmp_path, self.path)
+
+    def entry_for(self, source_path, template_hash, basepath, minify = False, precompress = None, stages = None):
+        entry = {
+            'source': os.path.normpath(source_path),
+            'source_hash': hash_file(source_path),
+            'template_hash': template_hash,
+            'basepath': basepath,
+            # output format changes, like code highlighting, invalidate every page
+            'generator': GENERATOR_VERSION,
+        }
+        # only set when on, so state from builds without --minify stays valid
+        if minify:
+            entry['minify'] = True
+        if precompress is not None:
+            entry['precompress'] = precompress
+        if stages is not None:
+            entry['stages'] = stages
+        return entry
+
+    def is_fresh(self, dest_path, entry):
+        dest_path = os.path.normpath(dest_path)
+        self.seen.add(dest_path)
+        return self.pages.get(dest_path) == entry and os.path.exists(dest_path)
+
+    def change_reason(self, dest_path, entry):
+        previous = self.pages.get(os.path.normpath(dest_path))
+        if previous is None:
+            return 'not built before'
+        if previous['source_hash'] != entry['source_hash']:
+            return f'{entry["source"]} changed'
+        if previous['template_hash'] != entry['template_hash']:
+            return 'its layout changed'
+        if previous.get('generator') != entry['generator']:
+            return 'the generator was updated'
+        if previous['basepath'] != entry['basepath']:
+            return f'the basepath changed to {entry["basepath"]}'
+        if previous.get('minify') != entry.get('minify'):
+            return 'minification was switched on' if entry.get('minify') else 'minification was switched off'
+        if previous.get('precompress') != entry.get('precompress'):
+            return f'precompression changed to {entry.get("precompress") or "off"}'
+        if previous.get('stages') != entry.get('stages'):
+            return 'the fingerprint or image attributes of something it references changed'
+        return 'it was not in the build state'
+
+    def record(self, dest_path, entry):
+        dest_path = os.path.normpath(dest_path)
+        self.seen.add(dest_path)
+        self.pages[dest_path] = entry
+
+    def remove(self, dest_path, root):
+        dest_path = os.path.normpath(dest_path)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+            remove_siblings(dest_path)
+            prune_empty_dirs(os.path.dirname(dest_path), root)
+        self.pages.pop(dest_path, None)
+        self.seen.discard(dest_path)
+
+    def remove_stale(self, root):
+        removed = sorted(set(self.pages) - self.seen)
+        for dest_path in removed:
+            self.remove(dest_path, root)
+        return removed
+
+def prune_empty_dirs(directory, root):
+    root = os.path.abspath(root)
+    directory = os.path.abspath(directory)
+    while directory != root and directory.startswith(root + os.sep):
+        if os.listdir(directory):
+            return
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
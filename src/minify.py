@@ -0,0 +1,137 @@
+import re
+
+# whitespace next to these tags never renders, so it is dropped instead of collapsed
+BLOCK_TAGS = {
+    'html', 'head', 'body', 'title', 'meta', 'link', 'script', 'style', 'article', 'aside', 'blockquote',
+    'div', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol',
+    'p', 'pre', 'section', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul', '!doctype',
+}
+# everything up to the closing tag is copied byte for byte
+VERBATIM_TAGS = ('pre', 'textarea', 'script', 'style')
+WHITESPACE = re.compile(r'\s+')
+TAG_NAME = re.compile(r'</?([!\w-]+)')
+# a > inside a quoted attribute value does not end the tag
+TAG = re.compile(r'<(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+# a < that is not followed by a name, / or ! is text, like the one in "< Back"
+TAG_OPEN = re.compile(r'<[A-Za-z/!]')
+NEXT_TAG = re.compile(r'<(?=[A-Za-z/!])|<$')
+TAG_PART = re.compile(r'"[^"]*"|\'[^\']*\'|\s+')
+UNQUOTED_VALUE = re.compile(r'[^\s"\'=<>`]+')
+
+
+def minify_tag(tag):
+    # whitespace between attributes collapses, quoted values are kept as written
+    def part(match):
+        token = match.group()
+        if token[0] not in '"\'':
+            return ' '
+        value = token[1:-1]
+        # an unquoted value ending in / would swallow the / of a self-closing tag
+        if tag[match.start() - 1] == '=' and UNQUOTED_VALUE.fullmatch(value) and not value.endswith('/'):
+            return value
+        return token
+    return TAG_PART.sub(part, tag)
+
+class Minifier:
+    # a write() filter: fragments go in, minified HTML comes out. Tags and
+    # comments may be split across fragments, incomplete ones wait in a buffer
+    def __init__(self, write):
+        self.target_write = write
+        self.buffer = ''
+        self.space = False
+        self.after_block = True
+        self.verbatim = None
+
+    def write(self, fragment):
+        self.buffer += fragment
+        self.process(final = False)
+
+    def close(self):
+        self.process(final = True)
+        if self.buffer:
+            self.target_write(self.buffer)
+            self.buffer = ''
+
+    def process(self, final):
+        text = self.buffer
+        position = 0
+        while position < len(text):
+            if self.verbatim is not None:
+                end = text.lower().find(f'</{self.verbatim}', position)
+                if end == -1:
+                    # keep enough back to recognise a closing tag split across fragments
+                    keep = 0 if final else len(self.verbatim) + 2
+                    if len(text) - position > keep:
+                        self.target_write(text[position:len(text) - keep])
+                        position = len(text) - keep
+                    break
+                self.target_write(text[position:end])
+                position = end
+                self.verbatim = None
+                continue
+
+            if text.startswith('<!--', position):
+                end = text.find('-->', position)
+                if end == -1:
+                    break
+                position = end + 3
+                continue
+
+            if text[position] == '<':
+                if position + 1 == len(text) and not final:
+                    break
+                if TAG_OPEN.match(text, position):
+                    match = TAG.match(text, position)
+                    if match is None:
+                        break
+                    self.tag(match.group())
+                    position = match.end()
+                    continue
+
+            match = NEXT_TAG.search(text, position + 1)
+            end = match.start() if match is not None else -1
+            if end == -1:
+                if not final:
+                    self.text(text[position:])
+                    position = len(text)
+                    break
+                end = len(text)
+            self.text(text[position:end])
+            position = end
+        self.buffer = text[position:]
+
+    def text(self, text):
+        collapsed = WHITESPACE.sub(' ', text)
+        if collapsed.startswith(' '):
+            self.space = True
+            collapsed = collapsed[1:]
+        if not collapsed:
+            return
+
+        if self.space and not self.after_block:
+            self.target_write(' ')
+        self.space = collapsed.endswith(' ')
+        self.target_write(collapsed.rstrip(' '))
+        self.after_block = False
+
+    def tag(self, tag):
+        match = TAG_NAME.match(tag)
+        name = match.group(1).lower() if match is not None else ''
+        block = name in BLOCK_TAGS
+        if self.space and not block and not self.after_block:
+            self.target_write(' ')
+        self.space = False
+        self.after_block = block
+
+        if name in VERBATIM_TAGS and not tag.startswith('</'):
+            self.target_write(tag)
+            self.verbatim = name
+        else:
+            self.target_write(minify_tag(tag))
+
+def minify_html(text):
+    parts = []
+    minifier = Minifier(parts.append)
+    minifier.write(text)
+    minifier.close()
+    return ''.join(parts)
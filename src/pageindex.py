@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+from datetime import date, datetime
+
+
+def parse_date(value, title):
+    # ISO dates only, so listings sort them as strings and feeds can format them
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m-%d')
+    try:
+        return datetime.fromisoformat(str(value).strip()).strftime('%Y-%m-%d')
+    except ValueError:
+        print(f'Ignoring date {value!r} of {title!r}, dates must look like 2024-01-05', file = sys.stderr)
+        return None
+
+def entry_from_meta(meta, title):
+    tags = meta.get('tags', [])
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',') if t.strip()]
+
+    title = meta.get('title') or title
+    return {
+        'title': title,
+        'date': parse_date(meta['date'], title) if meta.get('date') else None,
+        'tags': tags,
+        'draft': meta.get('draft') is True,
+    }
+
+def url_for(dest_path, root):
+    url = '/' + os.path.relpath(dest_path, root).replace(os.sep, '/')
+    if url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    return url
+
+class PageIndex:
+    def __init__(self, path, root):
+        self.path = path
+        self.root = root
+        self.entries = {}
+        self.changed = set()
+        self.load()
+
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for entry in json.load(f):
+                # state written before dates were validated
+                if entry['date']:
+                    entry['date'] = parse_date(entry['date'], entry['title'])
+                self.entries[entry['output']] = entry
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump([self.entries[k] for k in sorted(self.entries)], f, separators = (',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def update(self, source_path, dest_path, entry):
+        output = os.path.normpath(dest_path)
+        entry = dict(entry, source = os.path.normpath(source_path), output = output, url = url_for(dest_path, self.root))
+        if self.entries.get(output) != entry:
+            self.entries[output] = entry
+            self.changed.add(output)
+
+    def has(self, dest_path):
+        return os.path.normpath(dest_path) in self.entries
+
+    def discard(self, dest_path):
+        if self.entries.pop(os.path.normpath(dest_path), None) is not None:
+            self.changed.add(os.path.normpath(dest_path))
+
+    def retain(self, outputs):
+        outputs = {os.path.normpath(o) for o in outputs}
+        for output in list(self.entries):
+            if output not in outputs:
+                del self.entries[output]
+                self.changed.add(output)
+
+    def pages(self, include_drafts = False):
+        return [e for e in self.entries.values() if include_drafts or not e['draft']]
+
+    def by_date(self, include_drafts = False):
+        # undated pages sort last, newest first otherwise
+        pages = self.pages(include_drafts)
+        return sorted(pages, key = lambda e: (e['date'] or '', e['url']), reverse = True)
+
+    def by_tag(self, include_drafts = False):
+        tags = {}
+        for entry in self.by_date(include_drafts):
+            for tag in entry['tags']:
+                tags.setdefault(tag, []).append(entry)
+        return tags
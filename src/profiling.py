@@ -0,0 +1,66 @@
+import json
+import time
+
+STAGES = ('read', 'block split', 'classify', 'inline parse', 'serialize', 'template fill', 'minify', 'write')
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] += now - self.last
+        self.last = now
+
+class BuildProfile:
+    def __init__(self):
+        self.pages = []
+
+    def add(self, path, timer, nodes, bytes_written):
+        self.pages.append({
+            'path': path,
+            'stages': timer.stages,
+            'total': sum(timer.stages.values()),
+            'nodes': nodes,
+            'bytes': bytes_written,
+        })
+
+    def merge(self, pages):
+        self.pages.extend(pages)
+
+    def stage_totals(self):
+        totals = dict.fromkeys(STAGES, 0.0)
+        for page in self.pages:
+            for stage, seconds in page['stages'].items():
+                totals[stage] += seconds
+        return totals
+
+    def report(self, top = 10):
+        totals = self.stage_totals()
+        overall = sum(totals.values()) or 1.0
+        lines = [f'Profiled {len(self.pages)} pages, {overall * 1000:.1f} ms spent rendering']
+
+        lines.append('Stage breakdown:')
+        for stage, seconds in totals.items():
+            lines.append(f'  {stage:>14}: {seconds * 1000:9.1f} ms {seconds / overall * 100:5.1f}%')
+
+        nodes = sum(page['nodes'] for page in self.pages)
+        written = sum(page['bytes'] for page in self.pages)
+        lines.append(f'Nodes created: {nodes}, bytes written: {written}')
+
+        lines.append('Slowest pages:')
+        for page in sorted(self.pages, key = lambda p: p['total'], reverse = True)[:top]:
+            lines.append(f'  {page["total"] * 1000:9.1f} ms  {page["path"]}')
+        return '\n'.join(lines)
+
+    def save_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'stages': self.stage_totals(), 'pages': self.pages}, f, indent = 1)
+
+def count_nodes(node):
+    count = 1
+    for child in node.children or ():
+        count += count_nodes(child)
+    return count
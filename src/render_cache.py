@@ -0,0 +1,84 @@
+import hashlib
+import os
+import tarfile
+
+# bump whenever a change to the generator alters rendered output,
+# so pages cached by an older version are never served
+GENERATOR_VERSION = '2'
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, template_hash, basepath, assets_digest = None):
+        parts = [GENERATOR_VERSION, source_hash, template_hash, basepath]
+        if assets_digest is not None:
+            # fingerprinted asset names end up in the page, so they are part of its identity
+            parts.append(assets_digest)
+        text = '\0'.join(parts)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self.path_for(key)
+        try:
+            with open(path, 'r', encoding = 'utf-8') as f:
+                html = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # eviction is least recently used first, so a hit refreshes the entry
+        os.utime(path)
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding = 'utf-8') as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def entries(self):
+        entries = []
+        if not os.path.exists(self.directory):
+            return entries
+        for directory, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def export(self, archive_path):
+        with tarfile.open(archive_path, 'w:gz') as tar:
+            for _, _, path in self.entries():
+                tar.add(path, arcname = os.path.relpath(path, self.directory))
+
+    def import_archive(self, archive_path):
+        os.makedirs(self.directory, exist_ok = True)
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            tar.extractall(self.directory, filter = 'data')
+
+    def __str__(self):
+        return f'{self.hits} hits, {self.misses} misses'
@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import unicodedata
+
+from compress import remove_siblings
+from manifest import hash_file
+from textnode import TextType
+
+# bump whenever tokenizing or the file layout changes, older state is rebuilt
+SEARCH_VERSION = 1
+# shards hold every term starting with the same PREFIX_LENGTH characters
+PREFIX_LENGTH = 2
+WORD = re.compile(r'[^\W_]+')
+STOP_WORDS = frozenset('''
+    a about above after again against all am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each few for from further had has have having he her
+    here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+    now of off on once only or other our ours ourselves out over own same she should so some such than that the
+    their theirs them themselves then there these they this those through to too under until up very was we
+    were what when where which while who whom why will with would you your yours yourself yourselves
+'''.split())
+
+
+def normalize(text):
+    # case and accents do not matter, Éowyn is found by eowyn
+    text = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def page_terms(texts):
+    # {term: [positions]}, positions count stop words too so phrases keep their distances
+    terms = {}
+    position = 0
+    for text in texts:
+        for word in WORD.findall(normalize(text)):
+            if len(word) > 1 and word not in STOP_WORDS:
+                terms.setdefault(word, []).append(position)
+            position += 1
+    return terms
+
+def shard_name(prefix):
+    if prefix.isascii() and prefix.isalnum():
+        return f'{prefix}.json'
+    return prefix.encode('utf-8').hex() + '.json'
+
+def plain_texts(nodes):
+    # what a reader sees of a run of TextNodes, image alt text aside
+    return [node.text for node in nodes if node.text_type != TextType.IMAGE]
+
+class TextCollector:
+    # the plain text of the current page, taken from the TextNodes of the inline parser
+    def __init__(self):
+        self.texts = []
+
+    def start_page(self):
+        self.texts = []
+
+    def skip_page(self):
+        # the page was not parsed, e.g. a render cache hit
+        self.texts = None
+
+    def add(self, texts):
+        if self.texts is not None:
+            self.texts.extend(texts)
+
+    def terms(self):
+        return page_terms(self.texts) if self.texts is not None else None
+
+class SearchIndex:
+    # per page postings are kept in the build state, only pages that were
+    # rendered replace theirs and only the shards of terms they touch are rewritten.
+    #
+    # search/index.json holds the document table and the shard file per prefix,
+    # a shard maps term -> [[doc, first position, gap, gap, ...], ...]
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.ids = {}
+        self.docs = []
+        self.shards = {}
+        self.dirty = set()
+        self.stale = {}
+        self.updated = 0
+        self.written = 0
+        self.removed = 0
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == SEARCH_VERSION:
+                self.pages = data['pages']
+                self.ids = data['ids']
+                self.docs = data['docs']
+                self.shards = data['shards']
+
+    def touch(self, terms):
+        self.dirty.update(term[:PREFIX_LENGTH] for term in terms)
+
+    def update(self, source_path, dest_path, terms, digest = None):
+        # digest is the source hash when the caller already has it
+        output = os.path.normpath(dest_path)
+        old = self.pages.get(output)
+        if digest is None:
+            digest = hash_file(source_path)
+        if terms is None:
+            # nothing was collected, the stored postings stay if the source is the same
+            if old is None or old['hash'] != digest:
+                self.stale[output] = source_path
+            return
+
+        self.stale.pop(output, None)
+        self.pages[output] = {'source': os.path.normpath(source_path), 'hash': digest, 'terms': terms}
+        previous = old['terms'] if old is not None else {}
+        if old is None or previous != terms:
+            # an edit far down the page leaves the positions of earlier terms alone
+            self.touch(t for t in set(previous) | set(terms) if previous.get(t) != terms.get(t))
+            self.updated += 1
+
+    def discard(self, dest_path):
+        old = self.pages.pop(os.path.normpath(dest_path), None)
+        if old is not None:
+            self.touch(old['terms'])
+            self.updated += 1
+        self.ids.pop(os.path.normpath(dest_path), None)
+
+    def missing(self, index):
+        # (source, output) of indexed pages without current postings
+        pages = [(entry['source'], output) for output, entry in index.entries.items() if output not in self.pages]
+        pages.extend((source, output) for output, source in self.stale.items())
+        return sorted(pages)
+
+    def assign_ids(self):
+        # ids outlive builds so adding a page does not renumber every shard
+        used = set(self.ids.values())
+        next_id = 0
+        for output in sorted(self.pages):
+            if output in self.ids:
+                continue
+            while next_id in used:
+                next_id += 1
+            self.ids[output] = next_id
+            used.add(next_id)
+
+    def write(self, root, index, basepath = '/', precompressor = None):
+        for output in [o for o in self.pages if o not in index.entries]:
+            self.discard(output)
+        self.assign_ids()
+
+        published = {entry['output'] for entry in index.pages()}
+        docs = [None] * (max(self.ids.values()) + 1 if self.ids else 0)
+        for output, doc in self.ids.items():
+            if output in published:
+                entry = index.entries[output]
+                docs[doc] = [f'{basepath}{entry["url"].lstrip("/")}', entry['title']]
+        # a page that turned into a draft, or back, changes which postings are public
+        for output, doc in self.ids.items():
+            previous = self.docs[doc] if doc < len(self.docs) else None
+            if (previous is None) != (docs[doc] is None):
+                self.touch(self.pages[output]['terms'])
+        changed = docs != self.docs
+        self.docs = docs
+
+        directory = os.path.join(root, 'search')
+        prefixes = {term[:PREFIX_LENGTH] for output, page in self.pages.items() if output in published for term in page['terms']}
+
+        shards = {prefix: shard_name(prefix) for prefix in sorted(prefixes)}
+        wanted = {p for p in shards if p in self.dirty or not os.path.exists(os.path.join(directory, shards[p]))}
+        postings = {prefix: {} for prefix in wanted}
+        for output in sorted(self.pages, key = self.ids.get):
+            if output not in published:
+                continue
+            doc = self.ids[output]
+            for term, positions in self.pages[output]['terms'].items():
+                shard = postings.get(term[:PREFIX_LENGTH])
+                if shard is not None:
+                    gaps = [positions[0]] + [b - a for a, b in zip(positions, positions[1:])]
+                    shard.setdefault(term, []).append([doc] + gaps)
+
+        for prefix, terms in postings.items():
+            self.write_file(os.path.join(directory, shards[prefix]), {t: terms[t] for t in sorted(terms)}, precompressor)
+        for prefix, name in self.shards.items():
+            if prefix not in shards:
+                path = os.path.join(directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+                    remove_siblings(path)
+                    self.removed += 1
+                if precompressor is not None:
+                    precompressor.forget(path)
+        changed = changed or shards != self.shards
+        self.shards = shards
+        index_path = os.path.join(directory, 'index.json')
+        if changed or not os.path.exists(index_path):
+            self.write_file(
+                index_path,
+                {'version': SEARCH_VERSION, 'prefix_length': PREFIX_LENGTH, 'docs': self.docs, 'shards': self.shards},
+                precompressor
+            )
+        self.dirty.clear()
+
+    def write_file(self, path, data, precompressor):
+        text = json.dumps(data, ensure_ascii = False, separators = (',', ':'))
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path + '.tmp', 'w', encoding = 'utf-8') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+        if precompressor is not None:
+            precompressor.write_text(path, text)
+        self.written += 1
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            data = {'version': SEARCH_VERSION, 'pages': self.pages, 'ids': self.ids, 'docs': self.docs, 'shards': self.shards}
+            json.dump(data, f, separators = (',', ':'), sort_keys = True)
+        os.replace(tmp_path, self.path)
+
+    def __str__(self):
+        return f'{len(self.pages)} pages, {self.updated} updated, {self.written} files written, {self.removed} removed'
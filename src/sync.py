@@ -0,0 +1,146 @@
+import fcntl
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from compress import is_compressible, remove_siblings
+from fingerprint import fingerprint_name
+from manifest import hash_file, prune_empty_dirs
+
+# linux ioctl that shares extents between two files on btrfs, xfs and friends
+FICLONE = 0x40049409
+LARGE_FILE = 1 << 20
+LINK_MODES = ('copy', 'hardlink', 'reflink')
+
+
+class SyncStats:
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.removed_files = 0
+        self.compressed_files = 0
+
+    def __str__(self):
+        compressed = f', precompressed {self.compressed_files}' if self.compressed_files else ''
+        return (
+            f'copied {self.copied_files} files ({format_bytes(self.copied_bytes)}), '
+            f'skipped {self.skipped_files} unchanged ({format_bytes(self.skipped_bytes)}), '
+            f'removed {self.removed_files} stale{compressed}'
+        )
+
+def format_bytes(count):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if count < 1024 or unit == 'GiB':
+            return f'{count:.1f} {unit}' if unit != 'B' else f'{count} B'
+        count /= 1024
+
+def reflink(source, target):
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+def place_file(source, target, link_mode):
+    if os.path.lexists(target):
+        os.remove(target)
+
+    try:
+        if link_mode == 'hardlink':
+            os.link(source, target)
+            return
+        if link_mode == 'reflink':
+            reflink(source, target)
+            return
+    except OSError:
+        # different filesystem or no support, fall back to a plain copy
+        pass
+    shutil.copy2(source, target)
+
+def is_unchanged(source, target, stat, entry, checksum):
+    try:
+        target_stat = os.stat(target)
+    except FileNotFoundError:
+        return False, None
+    if target_stat.st_size != stat.st_size:
+        return False, None
+
+    if not checksum:
+        return target_stat.st_mtime_ns == stat.st_mtime_ns, None
+
+    digest = hash_file(source)
+    if entry is not None and entry.get('hash') is not None:
+        return entry['hash'] == digest, digest
+    return hash_file(target) == digest, digest
+
+def sync_directory(source_dir, target_dir, manifest = None, checksum = False, link_mode = 'copy', jobs = 4, fingerprints = None, precompressor = None):
+    # with a fingerprints dict every file is written as name.<hash>.ext and
+    # the dict maps its site url to the fingerprinted one, with a Precompressor
+    # text files get .gz and .br siblings compressed from their source
+    if not os.path.exists(source_dir):
+        raise Exception('Source directory does not exist')
+
+    stats = SyncStats()
+    previous = dict(manifest.static) if manifest is not None else {}
+    by_source = {e['source']: e for e in previous.values() if e.get('source') is not None}
+    synced = {}
+    large = []
+    compress = []
+
+    for directory, _, files in os.walk(source_dir):
+        target_directory = os.path.join(target_dir, os.path.relpath(directory, source_dir))
+        os.makedirs(target_directory, exist_ok = True)
+
+        for name in files:
+            source = os.path.join(directory, name)
+            target = os.path.normpath(os.path.join(target_directory, name))
+            stat = os.stat(source)
+
+            if fingerprints is not None:
+                known = by_source.get(source)
+                if known is not None and (known['size'], known['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                    content_hash = known['hash']
+                else:
+                    content_hash = hash_file(source)
+                target = fingerprint_name(target, content_hash)
+                url = '/' + os.path.relpath(source, source_dir).replace(os.sep, '/')
+                fingerprints[url] = '/' + os.path.relpath(target, target_dir).replace(os.sep, '/')
+
+            unchanged, digest = is_unchanged(source, target, stat, previous.get(target), checksum)
+            synced[target] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+            if fingerprints is not None:
+                synced[target].update(source = source, hash = content_hash)
+            if precompressor is not None and is_compressible(target):
+                if not unchanged or not precompressor.has_siblings(target):
+                    compress.append((source, target))
+            if unchanged:
+                stats.skipped_files += 1
+                stats.skipped_bytes += stat.st_size
+                continue
+
+            stats.copied_files += 1
+            stats.copied_bytes += stat.st_size
+            if stat.st_size >= LARGE_FILE and jobs > 1:
+                large.append((source, target))
+            else:
+                place_file(source, target, link_mode)
+
+    if large or compress:
+        # zlib and brotli release the GIL, so threads compress in parallel too
+        with ThreadPoolExecutor(max_workers = jobs) as pool:
+            futures = [pool.submit(place_file, s, t, link_mode) for s, t in large]
+            futures += [pool.submit(precompressor.compress_file, s, t) for s, t in compress]
+            for future in futures:
+                future.result()
+        stats.compressed_files += len(compress)
+
+    for target in sorted(set(previous) - set(synced)):
+        if os.path.exists(target):
+            os.remove(target)
+            remove_siblings(target)
+            prune_empty_dirs(os.path.dirname(target), target_dir)
+        stats.removed_files += 1
+
+    if manifest is not None:
+        manifest.static = synced
+    return stats
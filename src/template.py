@@ -0,0 +1,122 @@
+import hashlib
+import os
+import re
+
+TITLE = '{{ Title }}'
+CONTENT = '{{ Content }}'
+PLACEHOLDERS = (TITLE, CONTENT)
+EXTENDS_PATTERN = re.compile(r'\s*\{%\s*extends\s+"([^"]+)"\s*%\}')
+BLOCK_PATTERN = re.compile(r'\{%\s*block\s+(\w+)\s*%\}(.*?)\{%\s*endblock\s*%\}', re.S)
+URL_ATTRIBUTE = re.compile(r'(href|src)="/([^"?#]*)')
+
+
+def rewrite_basepath(text, basepath):
+    if basepath == '/':
+        return text
+    text = text.replace('href="/', f'href="{basepath}')
+    return text.replace('src="/', f'src="{basepath}')
+
+def rewrite_urls(text, basepath, assets = None):
+    # the basepath rewrite, and with an AssetMap the fingerprinted names of
+    # static files are swapped in by the same substitution
+    if assets is None:
+        return rewrite_basepath(text, basepath)
+    if '="/' not in text:
+        return text
+    return URL_ATTRIBUTE.sub(lambda m: f'{m.group(1)}="{basepath}{assets.get("/" + m.group(2))[1:]}', text)
+
+class Template:
+    def __init__(self, source, basepath = '/', dependencies = None, assets = None):
+        self.basepath = basepath
+        self.assets = assets
+        self.dependencies = dependencies or []
+        if assets is not None:
+            # the layout's output changes when an asset it references gets a new name
+            source_key = source + ''.join(assets.get('/' + m.group(2)) for m in URL_ATTRIBUTE.finditer(source))
+        else:
+            source_key = source
+        self.digest = hashlib.sha256(source_key.encode('utf-8')).hexdigest()
+        self.parts = compile_template(source, basepath, assets)
+
+    @classmethod
+    def from_file(cls, path, basepath = '/', assets = None):
+        source, dependencies = resolve_layout(path)
+        return cls(source, basepath, dependencies, assets)
+
+    def render(self, title, content):
+        values = {
+            TITLE: rewrite_urls(title, self.basepath, self.assets),
+            CONTENT: rewrite_urls(content, self.basepath, self.assets),
+        }
+        return ''.join([values[text] if is_slot else text for is_slot, text in self.parts])
+
+    def write(self, write, title, content):
+        # content may be a rendered string or an HTMLNode streamed fragment by fragment
+        rewrite = write
+        if self.basepath != '/' or self.assets is not None:
+            rewrite = lambda fragment: write(rewrite_urls(fragment, self.basepath, self.assets))
+
+        for is_slot, text in self.parts:
+            if not is_slot:
+                write(text)
+            elif text == TITLE:
+                rewrite(title)
+            elif isinstance(content, str):
+                rewrite(content)
+            else:
+                content.write_html(rewrite)
+
+def compile_template(source, basepath, assets = None):
+    # split into (is_slot, text) parts, static text gets its basepath applied now
+    parts = []
+    position = 0
+    while True:
+        found = [(source.find(p, position), p) for p in PLACEHOLDERS]
+        found = [(index, p) for index, p in found if index != -1]
+        if not found:
+            break
+        index, placeholder = min(found)
+        if index > position:
+            parts.append((False, rewrite_urls(source[position:index], basepath, assets)))
+        parts.append((True, placeholder))
+        position = index + len(placeholder)
+
+    if position < len(source):
+        parts.append((False, rewrite_urls(source[position:], basepath, assets)))
+    return parts
+
+def resolve_layout(path, overrides = None, seen = ()):
+    # flattens {% extends %} chains; blocks from the most derived layout win
+    # and the returned dependencies list every file the result was built from
+    if path in seen:
+        raise Exception(f'Layout {path} extends itself')
+    with open(path, 'r') as f:
+        source = f.read()
+
+    blocks = dict(BLOCK_PATTERN.findall(source))
+    blocks.update(overrides or {})
+
+    parent = EXTENDS_PATTERN.match(source)
+    if parent is not None:
+        parent_path = os.path.normpath(os.path.join(os.path.dirname(path), parent.group(1)))
+        flat, dependencies = resolve_layout(parent_path, blocks, seen + (path,))
+        return flat, dependencies + [path]
+
+    flat = BLOCK_PATTERN.sub(lambda m: blocks.get(m.group(1), m.group(2)), source)
+    return flat, [path]
+
+_templates = {}
+
+def load_template(path, basepath = '/', assets = None):
+    # compiled once per build, recompiled when the layout or any layout it extends changes
+    key = (path, basepath, assets.digest if assets is not None else None)
+    cached = _templates.get(key)
+    if cached is not None:
+        mtimes, template = cached
+        if all(os.stat(p).st_mtime_ns == mtime for p, mtime in mtimes):
+            return template
+
+    template = Template.from_file(path, basepath, assets)
+    dependencies = template.dependencies
+    _templates[key] = ([(p, os.stat(p).st_mtime_ns) for p in dependencies], template)
+    return template
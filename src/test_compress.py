@@ -0,0 +1,76 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import compress
+from compress import Precompressor, is_compressible
+from manifest import BuildManifest
+from sync import sync_directory
+
+class TestPrecompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, 'index.html')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, precompressor, fragments):
+        with open(self.page, 'w') as f:
+            tee = precompressor.tee(f.write)
+            for fragment in fragments:
+                tee.write(fragment)
+        precompressor.finish(self.page, tee)
+
+    def test_tee_matches_the_page(self):
+        precompressor = Precompressor(os.path.join(self.root, 'compressed.json'))
+        self.render(precompressor, ['<p>', 'hällo ' * 200, '</p>'])
+        with open(self.page, 'rb') as f, gzip.open(self.page + '.gz') as g:
+            self.assertEqual(g.read(), f.read())
+        if compress.brotli is not None:
+            with open(self.page, 'rb') as f, open(self.page + '.br', 'rb') as b:
+                self.assertEqual(compress.brotli.decompress(b.read()), f.read())
+
+    def test_unchanged_content_is_skipped(self):
+        path = os.path.join(self.root, 'compressed.json')
+        precompressor = Precompressor(path)
+        self.render(precompressor, ['<p>same</p>'])
+        precompressor.save()
+
+        precompressor = Precompressor(path)
+        self.render(precompressor, ['<p>', 'same', '</p>'])
+        self.assertEqual((precompressor.written, precompressor.skipped), (0, 1))
+
+        self.render(precompressor, ['<p>changed</p>'])
+        self.assertEqual(precompressor.written, 1)
+        self.assertEqual(gzip.open(self.page + '.gz').read(), b'<p>changed</p>')
+
+    def test_sync_compresses_text_assets(self):
+        source = os.path.join(self.root, 'static')
+        target = os.path.join(self.root, 'docs')
+        os.makedirs(source)
+        for name in ('index.css', 'logo.png'):
+            with open(os.path.join(source, name), 'w') as f:
+                f.write('body {}')
+
+        manifest = BuildManifest(os.path.join(self.root, 'manifest.json'))
+        stats = sync_directory(source, target, manifest, precompressor = Precompressor())
+        self.assertEqual(stats.compressed_files, 1)
+        self.assertEqual(gzip.open(os.path.join(target, 'index.css.gz')).read(), b'body {}')
+        self.assertFalse(os.path.exists(os.path.join(target, 'logo.png.gz')))
+
+        stats = sync_directory(source, target, manifest, precompressor = Precompressor())
+        self.assertEqual(stats.compressed_files, 0)
+
+        os.remove(os.path.join(source, 'index.css'))
+        sync_directory(source, target, manifest, precompressor = Precompressor())
+        self.assertFalse(os.path.exists(os.path.join(target, 'index.css.gz')))
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible('docs/index.HTML'))
+        self.assertFalse(is_compressible('docs/images/tom.png'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph, site_path
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.path = os.path.join(self.root, 'graph.json')
+        self.files = {}
+        for name in ('a.md', 'b.md', 'template.html', 'logo.png'):
+            self.files[name] = os.path.join(self.root, name)
+            self.write(name, name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), 'w') as f:
+            f.write(text)
+
+    def build(self):
+        graph = DependencyGraph(self.path)
+        f = self.files
+        graph.record('docs/a.html', f['a.md'], [f['a.md'], f['template.html'], f['logo.png']], ['docs/b.html'], reason = 'full build')
+        graph.record('docs/b.html', f['b.md'], [f['b.md'], f['template.html']], reason = 'full build')
+        graph.record('docs/tags/index.html', None, [f['template.html']], index = True, reason = 'full build')
+        graph.save()
+        return DependencyGraph(self.path)
+
+    def test_site_path(self):
+        self.assertEqual(site_path('/images/a.png', '/'), '/images/a.png')
+        self.assertEqual(site_path('../tom/', '/blog/glorfindel/'), '/blog/tom/')
+        self.assertEqual(site_path('x.png', '/blog/post.html'), '/blog/x.png')
+        self.assertIsNone(site_path('https://example.com/a', '/'))
+        self.assertIsNone(site_path('#top', '/'))
+
+    def test_asset_change_rebuilds_its_users_and_index_pages(self):
+        graph = self.build()
+        reasons = graph.rebuild_set([self.files['logo.png']])
+        self.assertEqual(set(reasons), {'docs/a.html', 'docs/tags/index.html'})
+        self.assertIn('logo.png changed', reasons['docs/a.html'])
+
+    def test_links_only_matter_when_the_target_moves(self):
+        graph = self.build()
+        self.assertEqual(set(graph.rebuild_set([self.files['b.md']])), {'docs/b.html', 'docs/tags/index.html'})
+        reasons = graph.rebuild_set([], removed_outputs = ['docs/b.html'])
+        self.assertIn('links to docs/b.html', reasons['docs/a.html'])
+
+    def test_changed_files_and_explain(self):
+        graph = self.build()
+        self.assertEqual(graph.changed_files(), [])
+
+        os.utime(self.files['template.html'], ns = (0, 0))
+        self.assertEqual(graph.changed_files(), [self.files['template.html']])
+        lines = graph.explain('docs/b.html')
+        self.assertEqual(lines[0], 'docs/b.html was last built because: full build')
+        self.assertIn('linked from docs/a.html', lines)
+        self.assertTrue(lines[-1].startswith('the next build rebuilds it'))
+
+        graph.refresh('docs/b.html')
+        self.assertNotIn(' (changed since)', '\n'.join(graph.explain('docs/b.html')))
+
+    def test_retain_keeps_generated_outputs(self):
+        graph = self.build()
+        graph.retain(['docs/b.html'])
+        self.assertEqual(set(graph.outputs), {'docs/b.html', 'docs/tags/index.html'})
+
+if __name__ == '__main__':
+    unittest.main()
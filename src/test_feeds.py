@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from feeds import GeneratedPages, generate_site_pages, output_path, rfc822, slugify_tag
+from pageindex import PageIndex, entry_from_meta
+from template import Template
+
+class TestGeneratedPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'docs')
+        self.state_path = os.path.join(self.tmp.name, 'generated.json')
+        self.template = Template('<title>{{ Title }}</title>{{ Content }}', '/site/')
+        self.index = PageIndex(None, self.root)
+        for name, date, tags in [('a', '2024-01-01', ['x']), ('b', '2024-02-01', ['x', 'y']), ('c', None, [])]:
+            meta = {'date': date, 'tags': tags} if date else {}
+            self.index.update(f'content/blog/{name}.md', os.path.join(self.root, 'blog', name, 'index.html'), entry_from_meta(meta, name.upper()))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, *parts):
+        with open(os.path.join(self.root, *parts)) as f:
+            return f.read()
+
+    def generate(self, **options):
+        state = GeneratedPages(self.state_path)
+        removed = generate_site_pages(self.index, self.template, self.root, state, basepath = '/site/', **options)
+        return state, removed
+
+    def test_listing_is_paginated_newest_first(self):
+        self.generate(listings = ['blog'], per_page = 2)
+        first = self.read('blog', 'index.html')
+        self.assertLess(first.index('>B<'), first.index('>A<'))
+        self.assertNotIn('>C<', first)
+        self.assertIn('<a href="/site/blog/page/2/">Older</a>', first)
+        self.assertIn('<title>Blog (page 2)</title>', self.read('blog', 'page', '2', 'index.html'))
+
+    def test_tags_sitemap_and_feed(self):
+        self.generate(tags = True, site_url = 'https://example.com/')
+        self.assertIn('<a href="/site/tags/y/">y</a>', self.read('tags', 'index.html'))
+        self.assertIn('>A<', self.read('tags', 'x', 'index.html'))
+
+        sitemap = self.read('sitemap.xml')
+        self.assertIn('<loc>https://example.com/site/blog/b/</loc><lastmod>2024-02-01</lastmod>', sitemap)
+        self.assertIn('<loc>https://example.com/site/tags/x/</loc>', sitemap)
+
+        feed = self.read('feed.xml')
+        self.assertEqual(feed.count('<item>'), 2)
+        self.assertIn(f'<pubDate>{rfc822("2024-02-01")}</pubDate>', feed)
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        state, _ = self.generate(listings = ['blog'], tags = True)
+        self.assertEqual(state.unchanged, 0)
+
+        state, _ = self.generate(listings = ['blog'], tags = True)
+        self.assertEqual(state.written, 0)
+
+        self.index.discard(os.path.join(self.root, 'blog', 'b', 'index.html'))
+        state, removed = self.generate(listings = ['blog'], tags = True)
+        self.assertEqual(removed, [os.path.normpath(os.path.join(self.root, 'tags', 'y', 'index.html'))])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'tags', 'y')))
+        self.assertEqual(state.written, 3)
+
+    def test_content_page_wins_over_listing(self):
+        self.index.update('content/blog/index.md', os.path.join(self.root, 'blog', 'index.html'), entry_from_meta({}, 'Blog'))
+        self.generate(listings = ['blog'])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'blog', 'index.html')))
+
+    def test_bad_date_does_not_break_the_feed(self):
+        self.index.update('content/blog/d.md', os.path.join(self.root, 'blog', 'd', 'index.html'), entry_from_meta({'date': 'January 5, 2024'}, 'D'))
+        self.generate(listings = ['blog'], site_url = 'https://example.com')
+        self.assertEqual(self.read('feed.xml').count('<item>'), 2)
+        self.assertIn('<loc>https://example.com/site/blog/d/</loc></url>', self.read('sitemap.xml'))
+
+    def test_tags_are_slugged(self):
+        self.assertEqual(slugify_tag('Middle Earth'), 'middle-earth')
+        self.assertIsNone(slugify_tag('../../escaped'))
+        self.assertIsNone(slugify_tag('???'))
+
+        meta = {'date': '2024-03-01', 'tags': ['middle earth', '../../escaped']}
+        self.index.update('content/blog/d.md', os.path.join(self.root, 'blog', 'd', 'index.html'), entry_from_meta(meta, 'D'))
+        self.generate(tags = True)
+        self.assertIn('<a href="/site/tags/middle-earth/">middle earth</a>', self.read('tags', 'index.html'))
+        self.assertIn('>D<', self.read('tags', 'middle-earth', 'index.html'))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['docs', 'generated.json'])
+        self.assertNotIn('escaped', self.read('tags', 'index.html'))
+
+    def test_output_path_stays_under_root(self):
+        with self.assertRaises(ValueError):
+            output_path(self.root, '/../../escaped/')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import io
+import unittest
+
+from frontmatter import read_front_matter
+
+class TestFrontMatter(unittest.TestCase):
+    def test_read_front_matter(self):
+        meta, lines = read_front_matter(io.StringIO('---\nlayout: blog\ntitle: "Quoted: title"\n---\n# Heading\n'))
+        self.assertEqual(meta, {'layout': 'blog', 'title': 'Quoted: title'})
+        self.assertEqual(''.join(lines), '# Heading\n')
+
+    def test_lists_and_flags(self):
+        text = '---\ntags: [tolkien, elves]\ndraft: true\ndate: 2024-01-31\naliases:\n  - /old\n  - "/older"\n---\n'
+        meta, _ = read_front_matter(io.StringIO(text))
+        self.assertEqual(meta, {
+            'tags': ['tolkien', 'elves'],
+            'draft': True,
+            'date': '2024-01-31',
+            'aliases': ['/old', '/older'],
+        })
+
+    def test_no_front_matter(self):
+        meta, lines = read_front_matter(io.StringIO('# Heading\n\n---\nnot: front matter\n'))
+        self.assertEqual(meta, {})
+        self.assertEqual(''.join(lines), '# Heading\n\n---\nnot: front matter\n')
+
+        meta, lines = read_front_matter(io.StringIO(''))
+        self.assertEqual((meta, list(lines)), ({}, []))
+
+    def test_unclosed_front_matter(self):
+        with self.assertRaises(Exception):
+            read_front_matter(io.StringIO('---\nlayout: blog\n# Heading\n'))
+
+if __name__ == '__main__':
+    unittest.main()
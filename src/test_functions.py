@@ -1,7 +1,9 @@
+import io
+import random
 import unittest
 
 from textnode import TextNode, TextType
-from functions import BlockType, text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, markdown_to_html
+from functions import BlockType, text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, text_to_textnodes_reference, markdown_to_blocks, iter_blocks, block_to_block_type, markdown_to_html
 
 class TestFunctions(unittest.TestCase):
     def test_convert_text_to_html(self):
@@ -147,6 +149,83 @@ class TestFunctions(unittest.TestCase):
             nodes
         )
         
+    def test_text_to_textnodes_matches_reference(self):
+        samples = [
+            '',
+            'plain text',
+            '**bold** at the start and _italic_ at the end _x_',
+            '****empty bold**** and `code with stars`',
+            '**bold with _underscores_ inside**',
+            'a [link](https://boot.dev) then ![image](/img.png) then `code`',
+            '![only image](/a.png)',
+            'text before![glued](/b.png)after',
+            'brackets [not a link] and (not a url)',
+            '[< Back Home](/)',
+        ]
+
+        for sample in samples:
+            self.assert_matches_reference(sample, sample)
+
+        # links and images come from a small pool so the same one often appears twice.
+        # The reference drops the text between copies of a link, see
+        # test_text_to_textnodes_keeps_repeated_links, so it gets a copy of the
+        # sample where every occurrence has its own #fragment, stripped again afterwards
+        rng = random.Random(1234)
+        pieces = ['word ', ' ', '**bold**', '_italic_', '`code`', 'x', '.', '[', ')', '!']
+        repeated = 0
+        for _ in range(300):
+            parts, unique_parts, targets = [], [], []
+            for j in range(rng.randint(0, 12)):
+                choice = rng.randint(0, len(pieces) + 3)
+                if choice < len(pieces):
+                    parts.append(pieces[choice])
+                    unique_parts.append(pieces[choice])
+                    continue
+                if choice % 2 == 0:
+                    target = f'[link {rng.randint(0, 1)}](https://example.com/{rng.randint(0, 1)}'
+                else:
+                    target = f'![image](/images/{rng.randint(0, 1)}.png'
+                parts.append(target + ')')
+                unique_parts.append(f'{target}#{j})')
+                targets.append(target)
+            repeated += len(set(targets)) < len(targets)
+            self.assert_matches_reference(''.join(parts), ''.join(unique_parts))
+        self.assertGreater(repeated, 50)
+
+    def assert_matches_reference(self, sample, unique_sample):
+        try:
+            expected = text_to_textnodes_reference(unique_sample)
+        except Exception:
+            with self.assertRaises(Exception):
+                text_to_textnodes(sample)
+            return
+        expected = [TextNode(n.text, n.text_type, n.url.split('#')[0] if n.url else n.url) for n in expected]
+        self.assertListEqual(text_to_textnodes(sample), expected, sample)
+
+    def test_text_to_textnodes_keeps_repeated_links(self):
+        # the reference splits on every copy of a link at once and loses the
+        # text between them, the lexer keeps every copy and the text around it
+        sample = '[x](y)[x](y)  [x](y)![i](j)!'
+        self.assertListEqual(
+            text_to_textnodes(sample),
+            [
+                TextNode('x', TextType.LINK, 'y'),
+                TextNode('x', TextType.LINK, 'y'),
+                TextNode('  ', TextType.TEXT),
+                TextNode('x', TextType.LINK, 'y'),
+                TextNode('i', TextType.IMAGE, 'j'),
+                TextNode('!', TextType.TEXT),
+            ]
+        )
+        self.assertNotEqual(text_to_textnodes_reference(sample), text_to_textnodes(sample))
+
+    def test_text_to_textnodes_unmatched_delimiter(self):
+        for sample in ['**unclosed bold', 'one _ underscore', 'a ` tick', '**ok** but _not']:
+            with self.assertRaises(Exception):
+                text_to_textnodes_reference(sample)
+            with self.assertRaises(Exception):
+                text_to_textnodes(sample)
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -168,6 +247,22 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        samples = [
+            '',
+            '\n\n\n',
+            '# Title\n\nparagraph\nsame paragraph\n\n\n- list\n- items\n',
+            'no trailing newline\n\nlast block',
+            'a\n \nb\n\n  \n\nc',
+            '```\ncode\n\nmore code\n```\n',
+        ]
+        rng = random.Random(99)
+        for i in range(200):
+            samples.append(''.join(rng.choice(['a', 'b ', ' ', '\n', '\n\n', '> q\n']) for _ in range(30)))
+
+        for sample in samples:
+            self.assertEqual(list(iter_blocks(io.StringIO(sample))), markdown_to_blocks(sample), repr(sample))
+
     def test_block_to_block_type(self):
         test = block_to_block_type('### Heading')
         self.assertEqual(test, BlockType.HEADING)
@@ -219,6 +314,20 @@ This is the same paragraph on a new line
         test = block_to_block_type(block)
         self.assertEqual(test, BlockType.PARAGRAPH)
 
+    def test_block_to_block_type_long_lists(self):
+        block = '\n'.join(f'{i}. item {i}' for i in range(1, 13))
+        self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
+
+        block = '\n'.join(f'{i}) item {i}' for i in range(1, 4))
+        self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
+
+        self.assertEqual(block_to_block_type('1. one\n3. three'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('- one\n> two'), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type('> one\n- two'), BlockType.PARAGRAPH)
+
+        html = markdown_to_html('\n'.join(f'{i}. item {i}' for i in range(1, 12))).to_html()
+        self.assertTrue(html.endswith('<li>item 9</li><li>item 10</li><li>item 11</li></ol></div>'))
+
     def test_markdown_to_html(self):
         md = '''
 ### This is a heading
@@ -282,5 +391,16 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_codeblock_with_language(self):
+        md = '```python title="x"\nif a < b:  # note\n    return "<b>"\n```'
+
+        html = markdown_to_html(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-python"><span class="tok-keyword">if</span> a &lt; b:  '
+            '<span class="tok-comment"># note</span>\n    <span class="tok-keyword">return</span> '
+            '<span class="tok-string">"&lt;b&gt;"</span>\n</code></pre></div>',
+        )
+
 if __name__ == '__main__':
     unittest.main()
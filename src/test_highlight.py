@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import highlight
+from highlight import HighlightCache, language_for, render_tokens, set_highlight_cache, tokenize
+
+class TestHighlight(unittest.TestCase):
+    def tearDown(self):
+        set_highlight_cache(HighlightCache())
+
+    def test_language_for(self):
+        self.assertEqual(language_for('Python title="a.py"'), 'python')
+        self.assertIsNone(language_for('  '))
+
+    def test_tokens_join_back_into_the_code(self):
+        samples = {
+            'python': 'def f(x):\n    """doc"""\n    return x * 0x1F  # hex\n',
+            'js': 'const a = `t${b}`; // c\n',
+            'bash': 'echo "$HOME" ${#list[@]} # done\n',
+            'json': '{"a": [1, -2.5e3, null]}\n',
+            'css': '@media screen { a { color: #fff; margin: 1.5em } }\n',
+            'html': '<a href="/x">y</a><!-- z -->\n',
+            'unknown': 'anything <at> all\n',
+        }
+        for language, code in samples.items():
+            tokens = tokenize(code, language)
+            self.assertEqual(''.join(text for _, text in tokens), code)
+            self.assertNotIn('<', render_tokens(tokens).replace('<span', '').replace('</span', ''))
+
+    def test_python_tokens(self):
+        self.assertEqual(
+            [t for t in tokenize('return "x"  # y', 'py') if t[0] is not None],
+            [('keyword', 'return'), ('string', '"x"'), ('comment', '# y')],
+        )
+
+    def test_cache_is_shared_through_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            set_highlight_cache(HighlightCache(tmp))
+            first = highlight.highlight('x = 1\n', 'python')
+            self.assertEqual(highlight.highlight_cache.misses, 1)
+
+            set_highlight_cache(HighlightCache(tmp))
+            self.assertEqual(highlight.highlight('x = 1\n', 'python'), first)
+            self.assertEqual(highlight.highlight('x = 1\n', 'python'), first)
+            self.assertEqual((highlight.highlight_cache.hits, highlight.highlight_cache.misses), (2, 0))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+    def test_memory_is_bounded(self):
+        set_highlight_cache(HighlightCache(maxsize = 2))
+        for code in ('a = 1\n', 'b = 2\n', 'a = 1\n', 'c = 3\n'):
+            highlight.highlight(code, 'python')
+        keys = [highlight.highlight_cache.key('python', code) for code in ('a = 1\n', 'c = 3\n')]
+        self.assertEqual(list(highlight.highlight_cache.entries), keys)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -44,6 +45,19 @@ class TestHTMLNode(unittest.TestCase):
             '<div><span><b>grandchild</b></span></div>'
         )
 
+    def test_write_html_streams_fragments(self):
+        node = ParentNode('div', [
+            ParentNode('p', [LeafNode(None, 'see '), LeafNode('a', 'here', {'href': '/x'})]),
+            LeafNode('b', 'bold'),
+        ])
+        parts = []
+        node.write_html(parts.append)
+        self.assertEqual(parts, ['<div>', '<p>', 'see ', '<a href="/x">here</a>', '</p>', '<b>bold</b>', '</div>'])
+
+        buffer = io.StringIO()
+        node.write_html(buffer.write)
+        self.assertEqual(buffer.getvalue(), node.to_html())
+
 
 
 if __name__ == '__main__':
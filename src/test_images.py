@@ -0,0 +1,85 @@
+import os
+import struct
+import tempfile
+import unittest
+
+import functions
+from fingerprint import AssetMap
+from functions import set_image_stage, text_node_to_html_node
+from images import ImageCache, ImageStage, image_size, process_images
+from textnode import TextNode, TextType
+
+def png(width, height):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x06\x00\x00\x00'
+
+def jpeg(width, height):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+    sof = b'\xff\xc0' + struct.pack('>HBHH', 17, 8, height, width) + b'\x00' * 10
+    return b'\xff\xd8' + app0 + sof + b'\xff\xd9'
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        os.makedirs(os.path.join(self.static, 'images'))
+
+    def tearDown(self):
+        set_image_stage(None)
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.static, 'images', name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_image_size_from_headers(self):
+        samples = {
+            'a.png': (png(1344, 896), (1344, 896)),
+            'a.gif': (b'GIF89a' + struct.pack('<HH', 20, 10) + b'\x00' * 8, (20, 10)),
+            'a.jpg': (jpeg(640, 480), (640, 480)),
+            'a.webp': (b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x0a\x00\x00\x00' + b'\x00' * 4 + (799).to_bytes(3, 'little') + (599).to_bytes(3, 'little'), (800, 600)),
+            'a.txt': (b'not an image at all', None),
+        }
+        for name, (data, expected) in samples.items():
+            self.assertEqual(image_size(self.write(name, data)), expected, name)
+
+    def test_process_images_caches_by_hash(self):
+        self.write('tom.png', png(928, 468))
+        cache_path = os.path.join(self.tmp.name, 'images.json')
+        cache = ImageCache(cache_path, os.path.join(self.tmp.name, 'variants'))
+        images = process_images(self.static, os.path.join(self.tmp.name, 'docs'), cache)
+        self.assertEqual(images, {'/images/tom.png': {'width': 928, 'height': 468, 'variants': []}})
+        cache.save()
+
+        cache = ImageCache(cache_path, os.path.join(self.tmp.name, 'variants'))
+        self.assertEqual(len(cache.entries), 1)
+        self.write('tom.png', png(100, 50))
+        images = process_images(self.static, os.path.join(self.tmp.name, 'docs'), cache)
+        self.assertEqual(images['/images/tom.png']['width'], 100)
+        self.assertEqual(len(cache.entries), 1)
+
+    def test_attributes(self):
+        images = {
+            '/images/a.png': {'width': 1000, 'height': 500, 'variants': [['/images/a.0123456789-480w.png', 480]]},
+            '/images/b.png': {'width': 10, 'height': 5, 'variants': []},
+        }
+        stage = ImageStage(images, '/base/', AssetMap({'/images/a.png': '/images/a.ffffffffff.png'}))
+        attributes = stage.attributes('/images/a.png')
+        self.assertEqual(attributes['srcset'], '/base/images/a.0123456789-480w.png 480w, /base/images/a.ffffffffff.png 1000w')
+        self.assertEqual(ImageStage(images).attributes('/images/b.png'), {'loading': 'lazy', 'decoding': 'async', 'width': '10', 'height': '5'})
+        self.assertEqual(ImageStage(images).attributes('https://example.com/c.png'), {'loading': 'lazy', 'decoding': 'async'})
+
+    def test_image_nodes(self):
+        node = TextNode('alt', TextType.IMAGE, '/images/b.png')
+        self.assertEqual(text_node_to_html_node(node).to_html(), '<img src="/images/b.png" alt="alt"></img>')
+
+        set_image_stage(ImageStage({'/images/b.png': {'width': 10, 'height': 5, 'variants': []}}))
+        self.assertIsNotNone(functions.image_stage)
+        self.assertEqual(
+            text_node_to_html_node(node).to_html(),
+            '<img src="/images/b.png" alt="alt" loading="lazy" decoding="async" width="10" height="5"></img>'
+        )
+
+if __name__ == '__main__':
+    unittest.main()
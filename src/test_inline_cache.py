@@ -0,0 +1,49 @@
+import unittest
+
+from functions import markdown_to_html, set_inline_cache
+from inline_cache import InlineCache
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache(None)
+
+    def test_lru_eviction(self):
+        cache = InlineCache(2)
+        cache.put('a', '<b>a</b>')
+        cache.put('b', 'b')
+        self.assertEqual(cache.get('a'), '<b>a</b>')
+        cache.put('c', 'c')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '<b>a</b>')
+        self.assertEqual(cache.get('c'), 'c')
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_page_scope(self):
+        cache = InlineCache(10, shared = False)
+        cache.put('a', 'a')
+        cache.start_page()
+        self.assertIsNone(cache.get('a'))
+
+    def test_cached_render_matches(self):
+        md = '''
+# Title
+
+- [Home](/) and **bold**
+- [Home](/) and **bold**
+
+> [Home](/) and **bold**
+
+- [Home](/) and **bold**
+'''
+        expected = markdown_to_html(md).to_html()
+
+        cache = InlineCache(16)
+        set_inline_cache(cache)
+        self.assertEqual(markdown_to_html(md).to_html(), expected)
+        self.assertEqual(markdown_to_html(md).to_html(), expected)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph
+from linkcheck import LinkChecker
+
+class TestLinkChecker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        self.docs = os.path.join(self.tmp.name, 'docs')
+        os.makedirs(os.path.join(self.static, 'images'))
+        open(os.path.join(self.static, 'images', 'tom.png'), 'w').close()
+        self.checker = LinkChecker(self.docs, self.static)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def output(self, *parts):
+        return os.path.normpath(os.path.join(self.docs, *parts))
+
+    def test_resolve(self):
+        page = self.output('blog', 'tom', 'index.html')
+        self.assertEqual(self.checker.resolve('/images/tom.png', page), ('asset', os.path.join(self.static, 'images/tom.png')))
+        self.assertEqual(self.checker.resolve('/blog/tom', page), ('page', page))
+        self.assertEqual(self.checker.resolve('../glorfindel/#intro', page), ('page', self.output('blog', 'glorfindel', 'index.html')))
+        self.assertEqual(self.checker.resolve('/feed.xml', page), ('page', self.output('feed.xml')))
+        self.assertIsNone(self.checker.resolve('mailto:someone@example.com', page))
+
+    def test_broken(self):
+        graph = DependencyGraph(os.path.join(self.tmp.name, 'graph.json'))
+        references = [(3, '/blog/tom'), (4, '/images/tom.png'), (7, '/blog/nope'), (9, 'https://example.com'), (12, '/images/gone.png')]
+        graph.record(self.output('index.html'), 'content/index.md', [], references = references)
+        graph.record(self.output('blog', 'tom', 'index.html'), 'content/blog/tom/index.md', [])
+
+        self.assertEqual(self.checker.broken(graph), [
+            ('content/index.md', 7, '/blog/nope'),
+            ('content/index.md', 12, '/images/gone.png'),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import contextlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import main
+
+TEMPLATE = '<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>\n'
+PAGES = {
+    'index.md': '# Home\n\nRead the [blog](/blog/) or see ![a map](/images/map.png)',
+    'blog/index.md': '---\ndate: 2024-01-05\n---\n# Blog\n\nSome **posts** and `code`',
+}
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        self.write('template.html', TEMPLATE)
+        self.write('static/index.css', 'body {}')
+        self.write_png('static/images/map.png', 640, 480)
+        for name, text in PAGES.items():
+            self.write(os.path.join('content', name), text)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def write_png(self, path, width, height):
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x06\x00\x00\x00')
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build(self, *argv):
+        # returns what the build printed, a failed build leaves its exit code in self.status
+        self.status = 0
+        with contextlib.redirect_stdout(io.StringIO()) as out, contextlib.redirect_stderr(io.StringIO()):
+            try:
+                main.build_command(list(argv))
+            except SystemExit as e:
+                self.status = e.code
+        return out.getvalue()
+
+    def test_toggling_precompress_on_an_incremental_tree(self):
+        self.build('--incremental', '--site-url', 'https://example.com')
+        self.assertFalse(os.path.exists('docs/index.html.gz'))
+
+        self.build('--incremental', '--site-url', 'https://example.com', '--precompress')
+        for path in ('docs/index.html', 'docs/blog/index.html', 'docs/sitemap.xml', 'docs/feed.xml'):
+            self.assertTrue(os.path.exists(path + '.gz'), path)
+
+        out = self.build('--incremental', '--site-url', 'https://example.com')
+        self.assertNotIn('Skipping', out)
+        self.assertFalse(os.path.exists('docs/index.html.gz'))
+
+    def test_full_build_resets_the_incremental_state(self):
+        self.build('--incremental')
+        self.build('/other/')
+        self.assertIn('href="/other/blog/"', self.read('docs/index.html'))
+
+        out = self.build('--incremental')
+        self.assertNotIn('Skipping', out)
+        self.assertIn('href="/blog/"', self.read('docs/index.html'))
+        self.assertTrue(os.path.exists('docs/index.css'))
+
+        self.build('--minify')
+        out = self.build('--incremental')
+        self.assertNotIn('Skipping', out)
+        self.assertTrue(self.read('docs/index.html').endswith('</html>\n'))
+
+    def test_image_attributes_on_an_incremental_tree(self):
+        self.build('--incremental')
+        self.assertIn('<img src="/images/map.png" alt="a map"></img>', self.read('docs/index.html'))
+
+        self.build('--incremental', '--image-attributes')
+        self.assertIn('width="640" height="480"', self.read('docs/index.html'))
+
+        self.write_png('static/images/map.png', 320, 240)
+        self.build('--incremental', '--image-attributes')
+        self.assertIn('width="320" height="240"', self.read('docs/index.html'))
+
+    def test_unreferenced_static_files_do_not_rebuild_pages(self):
+        argv = ('--incremental', '--image-attributes', '--fingerprint')
+        self.build(*argv)
+        self.write_png('static/images/unused.png', 10, 10)
+        self.write('static/index.css', 'body { color: red }')
+        out = self.build(*argv)
+        self.assertIn('Skipping ./content/index.md, unchanged', out)
+        self.assertIn('Skipping ./content/blog/index.md, unchanged', out)
+
+        self.write_png('static/images/map.png', 320, 240)
+        out = self.build(*argv)
+        self.assertIn('Skipping ./content/blog/index.md, unchanged', out)
+        self.assertIn('width="320" height="240"', self.read('docs/index.html'))
+
+    def read_tree(self, root):
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_serial_and_parallel_output_match(self):
+        for number in range(6):
+            self.write(f'content/blog/post{number}.md', f'# Post {number}\n\n```python\nx = {number}\n```\n\n- **a** [b](/blog/)')
+        self.build()
+        serial = self.read_tree('docs')
+        self.build('--jobs', '3')
+        self.assertEqual(self.read_tree('docs'), serial)
+
+    def test_failing_page_does_not_abort_the_build(self):
+        self.write('content/blog/broken.md', '# Broken\n\nan **unclosed delimiter')
+        self.write('content/blog/no-layout.md', '---\nlayout: nope\n---\n# No layout')
+        self.write('content/blog/unclosed.md', '---\ntitle: Unclosed\n# Unclosed')
+        for argv in (['--jobs', '1'], ['--jobs', '2'], ['--incremental', '--jobs', '1'], ['--incremental', '--jobs', '2']):
+            shutil.rmtree('.build', ignore_errors = True)
+            shutil.rmtree('docs', ignore_errors = True)
+            self.build(*argv)
+            self.assertEqual(self.status, 1)
+            self.assertTrue(os.path.exists('docs/index.html'))
+            self.assertTrue(os.path.exists('docs/blog/index.html'))
+            self.assertFalse(os.path.exists('docs/blog/no-layout.html'))
+
+        # the pages that rendered were recorded, only the broken ones are tried again
+        out = self.build('--incremental', '--jobs', '2')
+        self.assertEqual(self.status, 1)
+        self.assertIn('Skipping ./content/index.md, unchanged', out)
+        self.assertNotIn('Skipping ./content/blog/broken.md', out)
+
+    def test_rebuild_changes(self):
+        self.build('--incremental')
+        manifest = main.BuildManifest(main.MANIFEST_PATH)
+        index = main.PageIndex(main.INDEX_PATH, main.OUTPUT_DIR)
+        graph = main.DependencyGraph(main.GRAPH_PATH)
+
+        self.write('content/blog/index.md', '# Posts')
+        with contextlib.redirect_stdout(io.StringIO()):
+            count, errors = main.rebuild_changes(['./content/blog/index.md'], [], '/', manifest, index, graph)
+        self.assertEqual((count, errors), (1, []))
+        self.assertIn('<title>Posts</title>', self.read('docs/blog/index.html'))
+
+        self.write('content/blog/index.md', '# Posts\n\nan **unclosed delimiter')
+        with contextlib.redirect_stdout(io.StringIO()):
+            count, errors = main.rebuild_changes(['./content/blog/index.md'], [], '/', manifest, index, graph)
+        self.assertEqual([e[0] for e in errors], ['content/blog/index.md'])
+
+if __name__ == '__main__':
+    unittest.main()
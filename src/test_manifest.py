@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.source = os.path.join(self.root, 'page.md')
+        self.output = os.path.join(self.root, 'docs', 'page.html')
+        os.makedirs(os.path.dirname(self.output))
+        self.write(self.source, '# Page')
+        self.write(self.output, '<h1>Page</h1>')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_unchanged_page_is_fresh(self):
+        path = os.path.join(self.root, 'manifest.json')
+        manifest = BuildManifest(path)
+        entry = manifest.entry_for(self.source, 'template-hash', '/')
+        self.assertFalse(manifest.is_fresh(self.output, entry))
+        manifest.record(self.output, entry)
+        manifest.save()
+
+        manifest = BuildManifest(path)
+        self.assertTrue(manifest.is_fresh(self.output, manifest.entry_for(self.source, 'template-hash', '/')))
+        self.assertFalse(manifest.is_fresh(self.output, manifest.entry_for(self.source, 'template-hash', '/blog/')))
+
+    def test_changed_source_is_stale(self):
+        manifest = BuildManifest(os.path.join(self.root, 'manifest.json'))
+        manifest.record(self.output, manifest.entry_for(self.source, 'template-hash', '/'))
+
+        self.write(self.source, '# Page, edited')
+        self.assertFalse(manifest.is_fresh(self.output, manifest.entry_for(self.source, 'template-hash', '/')))
+
+    def test_generator_version_is_recorded(self):
+        manifest = BuildManifest(os.path.join(self.root, 'manifest.json'))
+        entry = manifest.entry_for(self.source, 'template-hash', '/')
+        manifest.record(self.output, dict(entry, generator = 'older'))
+        self.assertFalse(manifest.is_fresh(self.output, entry))
+        self.assertEqual(manifest.change_reason(self.output, entry), 'the generator was updated')
+
+    def test_remove_stale(self):
+        path = os.path.join(self.root, 'manifest.json')
+        manifest = BuildManifest(path)
+        manifest.record(self.output, manifest.entry_for(self.source, 'template-hash', '/'))
+        manifest.save()
+
+        manifest = BuildManifest(path)
+        removed = manifest.remove_stale(self.root)
+        self.assertEqual(removed, [os.path.normpath(self.output)])
+        self.assertFalse(os.path.exists(self.output))
+        self.assertFalse(os.path.exists(os.path.dirname(self.output)))
+        self.assertEqual(manifest.pages, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from functions import markdown_to_html
+from minify import Minifier, minify_html
+
+PAGE = '''<!DOCTYPE html>
+<html>
+  <head>
+    <!-- generated -->
+    <meta charset="UTF-8" />
+    <link href="/index.css" rel="stylesheet" />
+    <title> Tolkien </title>
+  </head>
+  <body>
+    <article>
+      <p>The <b>hobbit</b>   <i>lives</i>
+      here.</p>
+      <a href="/blog/a b/" class="x y">home</a>
+      <pre><code class="language-python">def f():
+    <span class="tok-keyword">return</span>  1
+
+</code></pre>
+    </article>
+  </body>
+</html>
+'''
+
+class TestMinify(unittest.TestCase):
+    def test_minify_page(self):
+        self.assertEqual(
+            minify_html(PAGE),
+            '<!DOCTYPE html><html><head><meta charset=UTF-8 /><link href=/index.css rel=stylesheet />'
+            '<title>Tolkien</title></head><body><article><p>The <b>hobbit</b> <i>lives</i> here.</p>'
+            '<a href="/blog/a b/" class="x y">home</a><pre><code class="language-python">def f():\n'
+            '    <span class="tok-keyword">return</span>  1\n\n</code></pre></article></body></html>'
+        )
+
+    def test_fragment_boundaries_do_not_matter(self):
+        expected = minify_html(PAGE)
+        for size in (1, 2, 3, 7, 64):
+            parts = []
+            minifier = Minifier(parts.append)
+            for i in range(0, len(PAGE), size):
+                minifier.write(PAGE[i:i + size])
+            minifier.close()
+            self.assertEqual(''.join(parts), expected, size)
+
+    def test_code_blocks_are_byte_exact(self):
+        md = '```python\nif   x:\n    print( "a  <b>" )\n```\n\n```\nplain   text\n  indented\n```'
+        html = markdown_to_html(md).to_html()
+        minified = minify_html(html)
+        for block in html.split('<pre>')[1:]:
+            self.assertIn(block.split('</pre>')[0], minified)
+
+    def test_quotes_kept_where_needed(self):
+        self.assertEqual(minify_html('<a href="/a/">x</a>'), '<a href="/a/">x</a>')
+        self.assertEqual(minify_html('<img alt="" src="a.png">'), '<img alt="" src=a.png>')
+
+    def test_quoted_values_are_kept(self):
+        tag = '<img alt="a > b   c" title=\'x="y"\'   src="a.png">'
+        self.assertEqual(minify_html(f'<p>{tag}</p>'), '<p><img alt="a > b   c" title=\'x="y"\' src=a.png></p>')
+        parts = []
+        minifier = Minifier(parts.append)
+        for character in tag:
+            minifier.write(character)
+        minifier.close()
+        self.assertEqual(''.join(parts), minify_html(tag))
+
+    def test_stray_angle_brackets_are_text(self):
+        html = '<p><a href="/">< Back   Home</a> it\'s   1 < 2</p>'
+        self.assertEqual(minify_html(html), '<p><a href="/">< Back Home</a> it\'s 1 < 2</p>')
+
+if __name__ == '__main__':
+    unittest.main()
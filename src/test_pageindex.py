@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from pageindex import PageIndex, entry_from_meta, url_for
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'index.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entry_from_meta(self):
+        entry = entry_from_meta({'tags': 'a, b', 'date': '2024-05-01'}, 'Heading')
+        self.assertEqual(entry, {'title': 'Heading', 'date': '2024-05-01', 'tags': ['a', 'b'], 'draft': False})
+        self.assertEqual(entry_from_meta({'title': 'Meta', 'draft': True}, 'Heading')['title'], 'Meta')
+
+    def test_invalid_dates_are_dropped(self):
+        self.assertIsNone(entry_from_meta({'date': 'January 5, 2024'}, 'Heading')['date'])
+        self.assertEqual(entry_from_meta({'date': '2024-01-05T10:30:00'}, 'Heading')['date'], '2024-01-05')
+
+    def test_url_for(self):
+        self.assertEqual(url_for('docs/blog/tom/index.html', 'docs'), '/blog/tom/')
+        self.assertEqual(url_for('docs/index.html', 'docs'), '/')
+        self.assertEqual(url_for('docs/about.html', 'docs'), '/about.html')
+
+    def test_queries_and_persistence(self):
+        index = PageIndex(self.path, 'docs')
+        index.update('content/a.md', 'docs/a/index.html', entry_from_meta({'date': '2024-01-01', 'tags': ['x']}, 'A'))
+        index.update('content/b.md', 'docs/b/index.html', entry_from_meta({'date': '2024-02-01', 'tags': ['x', 'y']}, 'B'))
+        index.update('content/c.md', 'docs/c/index.html', entry_from_meta({'draft': True, 'tags': ['y']}, 'C'))
+        index.save()
+
+        index = PageIndex(self.path, 'docs')
+        self.assertEqual([e['title'] for e in index.by_date()], ['B', 'A'])
+        self.assertEqual({tag: [e['title'] for e in pages] for tag, pages in index.by_tag().items()}, {'x': ['B', 'A'], 'y': ['B']})
+        self.assertEqual(len(index.pages(include_drafts = True)), 3)
+
+        index.retain(['docs/a/index.html'])
+        self.assertEqual([e['title'] for e in index.pages()], ['A'])
+
+    def test_changed_tracking(self):
+        index = PageIndex(self.path, 'docs')
+        entry = entry_from_meta({}, 'A')
+        index.update('content/a.md', 'docs/a/index.html', entry)
+        index.save()
+
+        index = PageIndex(self.path, 'docs')
+        index.update('content/a.md', 'docs/a/index.html', entry)
+        self.assertEqual(index.changed, set())
+        index.update('content/a.md', 'docs/a/index.html', entry_from_meta({}, 'A, renamed'))
+        self.assertEqual(index.changed, {os.path.normpath('docs/a/index.html')})
+
+if __name__ == '__main__':
+    unittest.main()
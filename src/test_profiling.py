@@ -0,0 +1,29 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from profiling import STAGES, BuildProfile, StageTimer, count_nodes
+
+class TestProfiling(unittest.TestCase):
+    def test_count_nodes(self):
+        node = ParentNode('div', [ParentNode('p', [LeafNode(None, 'a'), LeafNode('b', 'c')])])
+        self.assertEqual(count_nodes(node), 4)
+
+    def test_report(self):
+        profile = BuildProfile()
+        for path in ['fast.md', 'slow.md']:
+            timer = StageTimer()
+            for stage in STAGES:
+                timer.lap(stage)
+            profile.add(path, timer, 3, 10)
+        profile.pages[1]['total'] += 1
+
+        totals = profile.stage_totals()
+        self.assertEqual(list(totals), list(STAGES))
+
+        report = profile.report(top = 1)
+        self.assertIn('Nodes created: 6, bytes written: 20', report)
+        self.assertIn('slow.md', report)
+        self.assertNotIn('fast.md', report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+
+from render_cache import RenderCache
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, 'cache'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_covers_every_input(self):
+        key = self.cache.key('source', 'template', '/')
+        self.assertEqual(key, self.cache.key('source', 'template', '/'))
+        self.assertNotEqual(key, self.cache.key('source2', 'template', '/'))
+        self.assertNotEqual(key, self.cache.key('source', 'template2', '/'))
+        self.assertNotEqual(key, self.cache.key('source', 'template', '/blog/'))
+
+    def test_get_and_put(self):
+        key = self.cache.key('a', 'b', '/')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, '<p>hi</p>')
+        self.assertEqual(self.cache.get(key), '<p>hi</p>')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_evict_oldest_first(self):
+        self.cache.max_bytes = 10
+        old, new = self.cache.key('old', '', '/'), self.cache.key('new', '', '/')
+        self.cache.put(old, 'x' * 8)
+        past = time.time() - 100
+        os.utime(self.cache.path_for(old), (past, past))
+        self.cache.put(new, 'y' * 8)
+
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertFalse(os.path.exists(self.cache.path_for(old)))
+        self.assertTrue(os.path.exists(self.cache.path_for(new)))
+
+    def test_export_import(self):
+        key = self.cache.key('a', 'b', '/')
+        self.cache.put(key, 'page')
+        archive = os.path.join(self.tmp.name, 'cache.tar.gz')
+        self.cache.export(archive)
+
+        restored = RenderCache(os.path.join(self.tmp.name, 'restored'))
+        restored.import_archive(archive)
+        self.assertEqual(restored.get(key), 'page')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import functions
+from functions import markdown_to_html, set_inline_cache, set_text_collector
+from inline_cache import InlineCache
+from pageindex import PageIndex
+from search import SearchIndex, TextCollector, page_terms, shard_name
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'docs')
+        self.state = os.path.join(self.tmp.name, 'search.json')
+        self.index = PageIndex(None, self.root)
+
+    def tearDown(self):
+        set_text_collector(None)
+        set_inline_cache(None)
+        self.tmp.cleanup()
+
+    def add_page(self, name, text, draft = False):
+        source = os.path.join(self.tmp.name, f'{name}.md')
+        with open(source, 'w') as f:
+            f.write(text)
+        dest = os.path.join(self.root, name, 'index.html')
+        self.index.update(source, dest, {'title': name, 'date': None, 'tags': [], 'draft': draft})
+        return source, dest
+
+    def shard(self, prefix):
+        with open(os.path.join(self.root, 'search', shard_name(prefix))) as f:
+            return json.load(f)
+
+    def test_page_terms(self):
+        terms = page_terms(['The Hobbit and ', 'the hobbit', ' of Éowyn'])
+        self.assertEqual(terms, {'hobbit': [1, 4], 'eowyn': [6]})
+
+    def test_collects_text_nodes(self):
+        collector = TextCollector()
+        set_text_collector(collector)
+        collector.start_page()
+        markdown_to_html('# Bilbo\n\nA **ring** in [Bag End](/bag-end) ![Gollum](/g.png)\n\n```\nnot indexed\n```')
+        self.assertEqual(sorted(collector.terms()), ['bag', 'bilbo', 'end', 'ring'])
+
+        # inline cache hits skip the parser but still reach the collector
+        set_inline_cache(InlineCache(16))
+        collector.start_page()
+        markdown_to_html('Frodo **Baggins**')
+        self.assertEqual(collector.terms(), {'frodo': [0], 'baggins': [1]})
+        with mock.patch('functions.text_to_textnodes', side_effect = AssertionError('parsed again')):
+            collector.start_page()
+            markdown_to_html('Frodo **Baggins**')
+        self.assertEqual(collector.terms(), {'frodo': [0], 'baggins': [1]})
+        self.assertEqual(functions.inline_cache.hits, 1)
+
+        collector.skip_page()
+        self.assertIsNone(collector.terms())
+
+    def test_incremental_updates(self):
+        bilbo = self.add_page('bilbo', 'x')
+        frodo = self.add_page('frodo', 'x')
+        search = SearchIndex(self.state)
+        search.update(*bilbo, {'baggins': [0], 'bilbo': [1]})
+        search.update(*frodo, {'baggins': [0, 2], 'frodo': [1]})
+        search.write(self.root, self.index, '/base/')
+        search.save()
+        self.assertEqual(self.shard('ba'), {'baggins': [[0, 0], [1, 0, 2]]})
+        with open(os.path.join(self.root, 'search', 'index.json')) as f:
+            self.assertEqual(json.load(f)['docs'], [['/base/bilbo/', 'bilbo'], ['/base/frodo/', 'frodo']])
+
+        search = SearchIndex(self.state)
+        search.update(*frodo, {'baggins': [0, 2], 'frodo': [1], 'sam': [3]})
+        search.write(self.root, self.index, '/base/')
+        # only the new term's shard is written, plus index.json which lists it
+        self.assertEqual(search.written, 2)
+        self.assertEqual(self.shard('sa'), {'sam': [[1, 3]]})
+
+        # unparsed pages keep their postings while the source is unchanged
+        search.update(*bilbo, None)
+        self.assertEqual(search.missing(self.index), [])
+        with open(bilbo[0], 'w') as f:
+            f.write('changed')
+        search.update(*bilbo, None)
+        self.assertEqual(search.missing(self.index), [bilbo])
+
+    def test_known_source_hash_is_not_recomputed(self):
+        bilbo = self.add_page('bilbo', 'x')
+        search = SearchIndex(self.state)
+        with mock.patch('search.hash_file', side_effect = AssertionError('hashed again')):
+            search.update(*bilbo, {'bilbo': [0]}, 'known-hash')
+        self.assertEqual(search.pages[os.path.normpath(bilbo[1])]['hash'], 'known-hash')
+
+    def test_removed_and_draft_pages(self):
+        bilbo = self.add_page('bilbo', 'x')
+        frodo = self.add_page('frodo', 'x')
+        search = SearchIndex(self.state)
+        search.update(*bilbo, {'bilbo': [0], 'ring': [1]})
+        search.update(*frodo, {'frodo': [0], 'ring': [1]})
+        search.write(self.root, self.index)
+
+        self.index.discard(bilbo[1])
+        self.add_page('frodo', 'x', draft = True)
+        search.write(self.root, self.index)
+        self.assertEqual(search.removed, 3)
+        self.assertEqual(os.listdir(os.path.join(self.root, 'search')), ['index.json'])
+
+if __name__ == '__main__':
+    unittest.main()
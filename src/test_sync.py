@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+from sync import sync_directory
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'static')
+        self.target = os.path.join(self.tmp.name, 'docs')
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, 'manifest.json'))
+        self.write('index.css', 'body {}')
+        self.write(os.path.join('images', 'tom.png'), 'not really a png')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, name):
+        with open(os.path.join(self.target, name)) as f:
+            return f.read()
+
+    def test_second_sync_skips_everything(self):
+        stats = sync_directory(self.source, self.target, self.manifest)
+        self.assertEqual(stats.copied_files, 2)
+        self.assertEqual(self.read(os.path.join('images', 'tom.png')), 'not really a png')
+
+        stats = sync_directory(self.source, self.target, self.manifest)
+        self.assertEqual(stats.copied_files, 0)
+        self.assertEqual(stats.skipped_files, 2)
+        self.assertEqual(stats.skipped_bytes, len('body {}') + len('not really a png'))
+
+    def test_changed_and_removed_files(self):
+        sync_directory(self.source, self.target, self.manifest)
+        self.write('index.css', 'body { color: red; }')
+        os.remove(os.path.join(self.source, 'images', 'tom.png'))
+
+        stats = sync_directory(self.source, self.target, self.manifest)
+        self.assertEqual(stats.copied_files, 1)
+        self.assertEqual(stats.removed_files, 1)
+        self.assertEqual(self.read('index.css'), 'body { color: red; }')
+        self.assertFalse(os.path.exists(os.path.join(self.target, 'images')))
+
+    def test_checksum_and_hardlink(self):
+        sync_directory(self.source, self.target, self.manifest, checksum = True, link_mode = 'hardlink')
+        source_stat = os.stat(os.path.join(self.source, 'index.css'))
+        target_stat = os.stat(os.path.join(self.target, 'index.css'))
+        self.assertEqual(source_stat.st_ino, target_stat.st_ino)
+
+        stats = sync_directory(self.source, self.target, self.manifest, checksum = True)
+        self.assertEqual(stats.copied_files, 0)
+
+    def test_fingerprints(self):
+        fingerprints = {}
+        sync_directory(self.source, self.target, self.manifest, fingerprints = fingerprints)
+        css = fingerprints['/index.css']
+        self.assertRegex(css, r'^/index\.[0-9a-f]{10}\.css$')
+        self.assertEqual(self.read(css[1:]), 'body {}')
+        self.assertFalse(os.path.exists(os.path.join(self.target, 'index.css')))
+
+        self.write('index.css', 'body { color: red; }')
+        fingerprints = {}
+        stats = sync_directory(self.source, self.target, self.manifest, fingerprints = fingerprints)
+        self.assertNotEqual(fingerprints['/index.css'], css)
+        self.assertEqual((stats.copied_files, stats.skipped_files, stats.removed_files), (1, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.target, css[1:])))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from fingerprint import AssetMap
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template, resolve_layout, rewrite_urls
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template('<title>{{ Title }}</title><body>{{ Content }}</body>')
+        self.assertEqual(
+            template.render('Hi', '<p>there</p>'),
+            '<title>Hi</title><body><p>there</p></body>'
+        )
+
+    def test_render_matches_replace_chain(self):
+        source = '<link href="/index.css" /><h1>{{ Title }}</h1>{{ Content }}<img src="/a.png" />'
+        content = '<a href="/blog/tom">Tom</a><img src="/images/tom.png" alt=""></img>'
+        basepath = '/static-site-generator/'
+
+        expected = source.replace('{{ Title }}', 'Title')
+        expected = expected.replace('{{ Content }}', content)
+        expected = expected.replace('href="/', f'href="{basepath}')
+        expected = expected.replace('src="/', f'src="{basepath}')
+
+        self.assertEqual(Template(source, basepath).render('Title', content), expected)
+
+    def test_write_streams_node_content(self):
+        template = Template('<a href="/">{{ Title }}</a>{{ Content }}', '/base/')
+        node = ParentNode('div', [LeafNode('a', 'Tom', {'href': '/blog/tom'})])
+
+        parts = []
+        template.write(parts.append, 'Home', node)
+        self.assertEqual(''.join(parts), template.render('Home', node.to_html()))
+        self.assertEqual(''.join(parts), '<a href="/base/">Home</a><div><a href="/base/blog/tom">Tom</a></div>')
+
+    def test_fingerprinted_assets(self):
+        assets = AssetMap({'/index.css': '/index.0123456789.css', '/images/tom.png': '/images/tom.abcdef0123.png'})
+        self.assertEqual(
+            rewrite_urls('<img src="/images/tom.png"><a href="/blog/tom#top">x</a>', '/base/', assets),
+            '<img src="/base/images/tom.abcdef0123.png"><a href="/base/blog/tom#top">x</a>'
+        )
+
+        template = Template('<link href="/index.css">{{ Content }}', '/', assets = assets)
+        node = ParentNode('p', [LeafNode('img', '', {'src': '/images/tom.png?v=1'})])
+        parts = []
+        template.write(parts.append, 'Home', node)
+        self.assertEqual(''.join(parts), '<link href="/index.0123456789.css"><p><img src="/images/tom.abcdef0123.png?v=1"></img></p>')
+
+        renamed = AssetMap({'/index.css': '/index.9999999999.css'})
+        self.assertNotEqual(template.digest, Template('<link href="/index.css">{{ Content }}', '/', assets = renamed).digest)
+        self.assertEqual(Template('{{ Content }}', assets = assets).digest, Template('{{ Content }}').digest)
+
+    def test_repeated_placeholders(self):
+        template = Template('{{ Title }}|{{ Title }}|{{ Content }}')
+        self.assertEqual(template.render('a', 'b'), 'a|a|b')
+
+    def test_load_template_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'template.html')
+            with open(path, 'w') as f:
+                f.write('{{ Content }}')
+
+            first = load_template(path, '/')
+            self.assertIs(load_template(path, '/'), first)
+            self.assertIsNot(load_template(path, '/blog/'), first)
+
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_layout_inheritance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = self.write(tmp, 'base.html', '<h1>{% block title %}{{ Title }}{% endblock %}</h1>{% block body %}{{ Content }}{% endblock %}')
+            page = self.write(tmp, 'page.html', '{% extends "base.html" %}\n{% block body %}<main>{{ Content }}</main>{% endblock %}')
+            post = self.write(tmp, 'post.html', '{% extends "page.html" %}{% block title %}Post: {{ Title }}{% endblock %}')
+
+            source, dependencies = resolve_layout(post)
+            self.assertEqual(source, '<h1>Post: {{ Title }}</h1><main>{{ Content }}</main>')
+            self.assertEqual(dependencies, [base, page, post])
+
+            self.assertEqual(load_template(base).render('T', 'c'), '<h1>T</h1>c')
+
+    def test_site_template_blocks(self):
+        # template.html marks both its title and its body as blocks
+        site = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'template.html')
+        with tempfile.TemporaryDirectory() as tmp:
+            child = self.write(tmp, 'post.html', f'{{% extends "{site}" %}}{{% block title %}}Post: {{{{ Title }}}}{{% endblock %}}')
+            html = load_template(child).render('T', 'c')
+            self.assertIn('<title>Post: T</title>', html)
+            self.assertIn('<article>c</article>', html)
+            self.assertIn('<title>T</title>', load_template(site).render('T', 'c'))
+
+    def test_load_template_reloads_when_parent_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = self.write(tmp, 'base.html', 'old {% block body %}{% endblock %}')
+            page = self.write(tmp, 'page.html', '{% extends "base.html" %}{% block body %}{{ Content }}{% endblock %}')
+            first = load_template(page)
+            self.assertEqual(first.render('', 'x'), 'old x')
+
+            self.write(tmp, 'base.html', 'new {% block body %}{% endblock %}')
+            stat = os.stat(base)
+            os.utime(base, ns = (stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+            second = load_template(page)
+            self.assertEqual(second.render('', 'x'), 'new x')
+            self.assertNotEqual(first.digest, second.digest)
+
+    def test_extends_cycle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write(tmp, 'loop.html', '{% extends "loop.html" %}')
+            with self.assertRaises(Exception):
+                resolve_layout(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,5 +17,10 @@ class TetsTextNode(unittest.TestCase):
         node5 = TextNode('This is a text node', TextType.IMAGE, 'random_url')
         self.assertNotEqual(node4, node5)
 
+    def test_compact(self):
+        node = TextNode('link', TextType.LINK, 'https://www.boot.dev')
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(repr(node), 'TextNode(link, link, https://www.boot.dev)')
+
 if __name__ == '__main__':
     unittest.main()
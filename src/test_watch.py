@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from watch import Watcher
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, 'content')
+        self.template = os.path.join(self.root, 'template.html')
+        os.makedirs(os.path.join(self.content, 'blog'))
+        self.write(os.path.join(self.content, 'index.md'), '# Home', 1)
+        self.write(os.path.join(self.content, 'blog', 'tom.md'), '# Tom', 1)
+        self.write(self.template, '{{ Content }}', 1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text, mtime):
+        with open(path, 'w') as f:
+            f.write(text)
+        # explicit times, so the test does not depend on the filesystem's timestamp resolution
+        os.utime(path, ns = (mtime, mtime))
+
+    def test_changes(self):
+        watcher = Watcher([self.content, self.template, os.path.join(self.root, 'layouts')])
+        self.assertEqual(watcher.changes(), ([], []))
+
+        index = os.path.join(self.content, 'index.md')
+        added = os.path.join(self.content, 'blog', 'new.md')
+        self.write(index, '# Home, edited', 2)
+        self.write(added, '# New', 2)
+        os.remove(os.path.join(self.content, 'blog', 'tom.md'))
+        self.assertEqual(watcher.changes(), (sorted([index, added]), [os.path.join(self.content, 'blog', 'tom.md')]))
+
+        # changes are reported once
+        self.assertEqual(watcher.changes(), ([], []))
+        self.write(self.template, '<main>{{ Content }}</main>', 3)
+        self.assertEqual(watcher.changes(), ([self.template], []))
+
+if __name__ == '__main__':
+    unittest.main()
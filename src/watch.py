@@ -0,0 +1,44 @@
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Watcher:
+    def __init__(self, paths):
+        self.paths = paths
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isfile(path):
+                snapshot[path] = os.stat(path).st_mtime_ns
+                continue
+            for directory, _, files in os.walk(path):
+                for name in files:
+                    file_path = os.path.join(directory, name)
+                    try:
+                        snapshot[file_path] = os.stat(file_path).st_mtime_ns
+                    except FileNotFoundError:
+                        continue
+        return snapshot
+
+    def changes(self):
+        current = self.scan()
+        changed = [p for p, mtime in current.items() if self.snapshot.get(p) != mtime]
+        removed = [p for p in self.snapshot if p not in current]
+        self.snapshot = current
+        return sorted(changed), sorted(removed)
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_directory(directory, port, host = '127.0.0.1'):
+    # loopback only unless a host is asked for, this is a development server
+    handler = functools.partial(QuietHandler, directory = directory)
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    return server